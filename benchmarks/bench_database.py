@@ -0,0 +1,198 @@
+"""
+Benchmarks DatabaseManager against a temporary SQLite file, without Discord.
+
+Every variant gets a fresh database that is filled with links first, then a
+number of workers run a random mix of lookups, links and unlinks. Variants are
+profile overrides, plus `schema_version` to stop at an older migration.
+
+`schema_version=0` is the original keyless `bbb` table, which the upserts of
+DatabaseManager cannot write to. That variant runs the original statements
+instead, each followed by a commit on the writer connection, so it measures
+the baseline before the migrations, the cache and the write batching.
+
+Example:
+    python -m benchmarks.bench_database --rows 100000 --concurrency 64 \\
+        --variant "default:" \\
+        --variant "full:synchronous=full,journal_mode=delete,read_pool_size=0" \\
+        --variant "no-search:schema_version=1" \\
+        --variant "baseline:schema_version=0"
+"""
+
+from argparse import ArgumentParser
+from asyncio import gather, run
+from os.path import dirname, realpath
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from database import DatabaseManager, load_profile
+
+ROOT = realpath(f"{dirname(__file__)}/..")
+OPERATIONS = ("get", "set", "remove")
+
+
+class LegacyLinks:
+    def __init__(self, database: DatabaseManager) -> None:
+        """
+        Runs the original link statements, which work on the keyless `bbb` table.
+
+        :param database: The database whose writer connection is used.
+        """
+        self.connection = database.connection
+
+    async def import_links(self, links: Iterable[Tuple[int, str, str]]) -> None:
+        await self.connection.executemany(
+            "INSERT INTO bbb(user_id, bbb_id, bbb_name) VALUES (?, ?, ?)", links
+        )
+        await self.connection.commit()
+
+    async def set_bbb_id(self, user_id: int, bbb_id: str, bbb_name: str) -> None:
+        await self.connection.execute(
+            "INSERT INTO bbb(user_id, bbb_id, bbb_name) VALUES (?, ?, ?)",
+            (user_id, bbb_id, bbb_name),
+        )
+        await self.connection.commit()
+
+    async def remove_bbb_id(self, user_id: int) -> None:
+        await self.connection.execute("DELETE FROM bbb WHERE user_id=?", (user_id,))
+        await self.connection.commit()
+
+    async def get_bbb_id(self, user_id: int) -> Optional[Tuple[str, str]]:
+        async with self.connection.execute(
+            "SELECT bbb_id, bbb_name FROM bbb WHERE user_id=?", (user_id,)
+        ) as cursor:
+            return await cursor.fetchone()
+
+
+def parse_value(value: str) -> Any:
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_variant(variant: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Parses a `name:key=value,key=value` variant.
+    """
+    name, _, overrides = variant.partition(":")
+    settings = {}
+    for override in filter(None, overrides.split(",")):
+        key, _, value = override.partition("=")
+        settings[key.strip()] = parse_value(value.strip())
+    return name, settings
+
+
+def percentile(latencies: List[float], fraction: float) -> float:
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+async def run_variant(
+    name: str, settings: Dict[str, Any], arguments
+) -> Dict[str, Dict[str, float]]:
+    settings = dict(settings)
+    schema_version = settings.pop("schema_version", None)
+    profile = load_profile({"database": settings})
+    with TemporaryDirectory() as directory:
+        database = await DatabaseManager.open(f"{directory}/benchmark.db", profile)
+        try:
+            await database.init_schema(
+                f"{ROOT}/database/schema.sql",
+                f"{ROOT}/database/migrations",
+                schema_version,
+            )
+            links = database if schema_version != 0 else LegacyLinks(database)
+            await links.import_links(
+                (user_id, f"{user_id:010d}", f"Player {user_id}")
+                for user_id in range(arguments.rows)
+            )
+
+            random = Random(arguments.seed)
+            weights = (arguments.reads, arguments.links, arguments.unlinks)
+            workload = [
+                (
+                    random.choices(OPERATIONS, weights)[0],
+                    random.randrange(arguments.rows * 2),
+                )
+                for _ in range(arguments.operations)
+            ]
+            latencies: Dict[str, List[float]] = {
+                operation: [] for operation in OPERATIONS
+            }
+
+            async def worker(offset: int) -> None:
+                for operation, user_id in workload[offset :: arguments.concurrency]:
+                    started = perf_counter()
+                    if operation == "get":
+                        await links.get_bbb_id(user_id)
+                    elif operation == "set":
+                        await links.set_bbb_id(
+                            user_id, f"{user_id:010d}", f"Player {user_id}"
+                        )
+                    else:
+                        await links.remove_bbb_id(user_id)
+                    latencies[operation].append(perf_counter() - started)
+
+            started = perf_counter()
+            await gather(*(worker(offset) for offset in range(arguments.concurrency)))
+            elapsed = perf_counter() - started
+        finally:
+            await database.close()
+
+    results = {}
+    latencies["total"] = [
+        latency for operation in OPERATIONS for latency in latencies[operation]
+    ]
+    for operation, operation_latencies in latencies.items():
+        operation_latencies.sort()
+        results[operation] = {
+            "count": len(operation_latencies),
+            "throughput": len(operation_latencies) / elapsed,
+            "p50": percentile(operation_latencies, 0.50) * 1000,
+            "p99": percentile(operation_latencies, 0.99) * 1000,
+        }
+    return results
+
+
+async def main() -> None:
+    parser = ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rows", type=int, default=10000, help="Links to prefill.")
+    parser.add_argument(
+        "--operations", type=int, default=20000, help="Operations to run."
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Concurrent workers."
+    )
+    parser.add_argument("--reads", type=float, default=90, help="Weight of lookups.")
+    parser.add_argument("--links", type=float, default=5, help="Weight of links.")
+    parser.add_argument("--unlinks", type=float, default=5, help="Weight of unlinks.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the workload.")
+    parser.add_argument(
+        "--variant",
+        action="append",
+        default=[],
+        help="A `name:key=value,...` profile variant, may be repeated.",
+    )
+    arguments = parser.parse_args()
+
+    variants = [parse_variant(variant) for variant in arguments.variant] or [
+        ("default", {})
+    ]
+    print(
+        f"{'variant':<16} {'operation':<10} {'count':>8} {'ops/s':>10} {'p50 ms':>8} {'p99 ms':>8}"
+    )
+    for name, settings in variants:
+        results = await run_variant(name, settings, arguments)
+        for operation, result in results.items():
+            print(
+                f"{name:<16} {operation:<10} {result['count']:>8} {result['throughput']:>10.0f} {result['p50']:>8.2f} {result['p99']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    run(main())
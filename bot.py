@@ -8,20 +8,42 @@ from logging import (
     CRITICAL,
     getLogger,
     StreamHandler,
-    FileHandler,
 )
+from logging.handlers import QueueHandler, QueueListener
 from os import name, getenv, listdir
 from os.path import realpath, dirname, isfile
 from platform import python_version, system, release
+from queue import SimpleQueue
 from sys import exit
-
-from aiosqlite import connect
-from discord import Status, Game, Embed, Intents, Message, __version__
+from typing import Optional
+
+from discord import (
+    Status,
+    Game,
+    Embed,
+    Guild,
+    Intents,
+    Interaction,
+    Message,
+    app_commands,
+    __version__,
+)
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
 from dotenv import load_dotenv
 
-from database import DatabaseManager
+from command_sync import CommandSyncer
+from database import DatabaseManager, load_profile
+from diagnostics import CommandProfiler, LoopWatchdog
+from logs import JsonFormatter, LazyQueueHandler, rotating_file_handler
+from metrics import Metrics
+from metrics.hooks import (
+    MetricsCommandTree,
+    MetricsContext,
+    record_context,
+    record_interaction,
+)
+from metrics.server import start_metrics_server
 
 if not isfile(f"{realpath(dirname(__file__))}/config.json"):
     exit("'config.json' not found! Please add it and try again.")
@@ -30,8 +52,6 @@ elif not isfile(f"{realpath(dirname(__file__))}/data.json"):
 else:
     with open(f"{realpath(dirname(__file__))}/config.json") as file:
         config = load(file)
-    with open(f"{realpath(dirname(__file__))}/data.json") as file:
-        data = load(file)
 
 """	
 Setup bot intents (events restrictions)
@@ -87,36 +107,86 @@ class LoggingFormatter(Formatter):
         CRITICAL: red + bold,
     }
 
-    def format(self, record):
-        log_color = self.COLORS[record.levelno]
+    def __init__(self, colors: bool = True) -> None:
+        """
+        Builds the formatter of every level once, instead of for every record.
+
+        :param colors: Whether to color the output with ANSI escape codes.
+        """
+        super().__init__()
+        self.formatters = {
+            level: Formatter(
+                self.log_format(log_color if colors else None),
+                "%Y-%m-%d %H:%M:%S",
+                style="{",
+            )
+            for level, log_color in self.COLORS.items()
+        }
+        self.default_formatter = Formatter(
+            self.log_format(self.bold if colors else None),
+            "%Y-%m-%d %H:%M:%S",
+            style="{",
+        )
+
+    def log_format(self, log_color: Optional[str]) -> str:
         log_format = "(black)[{asctime}](reset) (levelcolor)[{levelname}](reset) (green)[{name}](reset) {message}"
+        if log_color is None:
+            for placeholder in ("(black)", "(reset)", "(levelcolor)", "(green)"):
+                log_format = log_format.replace(placeholder, "")
+            return log_format
         log_format = log_format.replace("(black)", self.black + self.bold)
         log_format = log_format.replace("(reset)", self.reset)
         log_format = log_format.replace("(levelcolor)", log_color)
         log_format = log_format.replace("(green)", self.green + self.bold)
-        formatter = Formatter(log_format, "%Y-%m-%d %H:%M:%S", style="{")
-        return formatter.format(record)
+        return log_format
 
+    def format(self, record):
+        return self.formatters.get(record.levelno, self.default_formatter).format(
+            record
+        )
+
+
+logging_config = config.get("logging", {})
 
 logger = getLogger("Humbot")
 logger.setLevel(INFO)
 
 console_handler = StreamHandler()
-console_handler.setFormatter(LoggingFormatter())
-file_handler = FileHandler(filename="discord.log", encoding="utf-8", mode="w")
+console_colors = logging_config.get("colors", "auto")
+if console_colors == "auto":
+    console_colors = console_handler.stream.isatty() and not getenv("NO_COLOR")
+console_handler.setFormatter(LoggingFormatter(bool(console_colors)))
+console_handler.setLevel(logging_config.get("console_level", "INFO"))
+file_handler = rotating_file_handler(
+    logging_config.get("file", "discord.log"), logging_config
+)
 file_handler_formatter = Formatter(
     "[{asctime}] [{levelname}] [{name}] {message}", "%Y-%m-%d %H:%M:%S", style="{"
 )
 file_handler.setFormatter(file_handler_formatter)
+log_handlers = [console_handler, file_handler]
+if logging_config.get("json_file"):
+    json_handler = rotating_file_handler(logging_config["json_file"], logging_config)
+    json_handler.setFormatter(JsonFormatter())
+    log_handlers.append(json_handler)
+
+"""
+The loggers only put the records on a queue, the handlers write them out on
+the background thread of the listener, so logging never blocks the event loop.
+"""
+log_queue = SimpleQueue()
+queue_handler = (
+    LazyQueueHandler(log_queue)
+    if logging_config.get("lazy", False)
+    else QueueHandler(log_queue)
+)
+log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
 
 discord_logger = getLogger("discord")
 discord_logger.setLevel(INFO)
 
-discord_logger.addHandler(console_handler)
-discord_logger.addHandler(file_handler)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+discord_logger.addHandler(queue_handler)
+logger.addHandler(queue_handler)
 
 
 class DiscordBot(commands.Bot):
@@ -127,17 +197,38 @@ class DiscordBot(commands.Bot):
             help_command=None,
             status=Status.do_not_disturb,
             activity=Game(name="Starting..."),
+            tree_cls=MetricsCommandTree,
         )
         self.logger = logger
         self.config = config
-        self.data = data
+        self.data_path = f"{realpath(dirname(__file__))}/data.json"
         self.database = None
+        self.command_syncer = None
+        self.metrics = Metrics()
+        self.metrics_server = None
+        self.profiler = CommandProfiler()
+        self.watchdog = None
+        self.before_invoke(self.before_command)
+        self.after_invoke(self.after_command)
 
     async def init_db(self) -> None:
-        async with connect(f"{realpath(dirname(__file__))}/database/database.db") as db:
-            with open(f"{realpath(dirname(__file__))}/database/schema.sql") as db_file:
-                await db.executescript(db_file.read())
-            await db.commit()
+        """
+        Open the database, bring its schema up to date and start its maintenance task.
+        """
+        profile = load_profile(self.config)
+        self.database = await DatabaseManager.open(
+            f"{realpath(dirname(__file__))}/database/database.db", profile
+        )
+        version = await self.database.init_schema(
+            f"{realpath(dirname(__file__))}/database/schema.sql",
+            f"{realpath(dirname(__file__))}/database/migrations",
+        )
+        self.logger.info(f"Database schema at version {version}")
+        if profile["maintenance_interval"] > 0:
+            self.database_maintenance_task.change_interval(
+                seconds=profile["maintenance_interval"]
+            )
+            self.database_maintenance_task.start()
 
     async def load_cogs(self) -> None:
         """
@@ -167,24 +258,57 @@ class DiscordBot(commands.Bot):
         self.logger.info(f"Running on: {system()} {release()} ({name})")
         self.logger.info("-------------------")
         await self.init_db()
+        self.command_syncer = CommandSyncer(
+            self.tree,
+            self.database,
+            self.config.get("sync_concurrency", 4),
+            self.logger,
+        )
         await self.load_cogs()
-        self.sync_task.start()
-        self.database = DatabaseManager(
-            connection=await connect(
-                f"{realpath(dirname(__file__))}/database/database.db"
+        metrics_config = self.config.get("metrics", {})
+        if metrics_config.get("port", 0) > 0:
+            self.metrics_server = await start_metrics_server(
+                self.metrics,
+                metrics_config.get("host", "127.0.0.1"),
+                metrics_config["port"],
             )
-        )
+            self.logger.info(f"Serving metrics on port {metrics_config['port']}")
+        profiling_config = self.config.get("profiling", {})
+        if profiling_config.get("slow_callback_threshold", 0) > 0:
+            self.watchdog = LoopWatchdog(
+                self.loop, profiling_config["slow_callback_threshold"], self.logger
+            )
+            self.watchdog.start()
+        self.sync_task.start()
+
+    async def close(self) -> None:
+        """
+        Log out of Discord, then commit the pending writes and close the database.
+        """
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        self.sync_task.cancel()
+        self.database_maintenance_task.cancel()
+        if self.metrics_server is not None:
+            await self.metrics_server.cleanup()
+        await super().close()
+        if self.database is not None:
+            await self.database.close()
+            self.logger.info("Database closed")
 
     async def bot_sync(self) -> None:
-        await self.change_presence(activity=Game(name="Syncing..."), status=Status.idle)
-        await self.tree.sync()
-        for guild in self.guilds:
-            await self.tree.sync(guild=guild)
-        await self.change_presence(
-            activity=Game(name="Ready!"),
-            status=Status.online,
-        )
-        self.logger.info("Slash commands synced")
+        pending = await self.command_syncer.pending(self.guilds)
+        if pending:
+            await self.change_presence(
+                activity=Game(name="Syncing..."), status=Status.idle
+            )
+            synced = await self.command_syncer.sync_pending(pending)
+            self.logger.info(f"Slash commands synced in {synced}/{len(pending)} scopes")
+        if pending or self.sync_task.current_loop == 0:
+            await self.change_presence(
+                activity=Game(name="Ready!"),
+                status=Status.online,
+            )
 
     @tasks.loop(hours=1.0)
     async def sync_task(self) -> None:
@@ -200,6 +324,43 @@ class DiscordBot(commands.Bot):
         """
         await self.wait_until_ready()
 
+    @tasks.loop(hours=1.0)
+    async def database_maintenance_task(self) -> None:
+        """
+        Set up the database maintenance task of the bot.
+        """
+        await self.database.run_maintenance()
+
+    async def on_guild_remove(self, guild: Guild) -> None:
+        """
+        The code in this event is executed every time the bot leaves a guild.
+
+        :param guild: The guild that was left.
+        """
+        await self.command_syncer.forget(guild)
+
+    async def get_context(self, origin, /, *, cls=MetricsContext):
+        return await super().get_context(origin, cls=cls)
+
+    async def before_command(self, context: Context) -> None:
+        """
+        The code in this hook is executed right before a command runs, after its arguments have been parsed.
+
+        :param context: The context of the command that is about to run.
+        """
+        timer = getattr(context, "timer", None)
+        if timer is not None:
+            timer.mark_parsed()
+        context.profile = self.profiler.start(context.command.qualified_name)
+
+    async def after_command(self, context: Context) -> None:
+        """
+        The code in this hook is executed right after a command ran.
+
+        :param context: The context of the command that ran.
+        """
+        self.profiler.stop(getattr(context, "profile", None))
+
     async def on_message(self, message: Message) -> None:
         """
         The code in this event is executed every time someone sends a message, with or without the prefix
@@ -216,6 +377,7 @@ class DiscordBot(commands.Bot):
 
         :param context: The context of the command that has been executed.
         """
+        record_context(context)
         full_command_name = context.command.qualified_name
         split = full_command_name.split(" ")
         executed_command = str(split[0])
@@ -228,6 +390,17 @@ class DiscordBot(commands.Bot):
                 f"Executed {executed_command} command by {context.author} (ID: {context.author.id}) in DMs"
             )
 
+    async def on_app_command_completion(
+        self, interaction: Interaction, command: app_commands.Command
+    ) -> None:
+        """
+        The code in this event is executed every time an application command has been *successfully* executed.
+
+        :param interaction: The interaction of the command that has been executed.
+        :param command: The command that has been executed.
+        """
+        record_interaction(interaction)
+
     async def on_command_error(self, context: Context, error) -> None:
         """
         The code in this event is executed every time a normal valid command catches an error.
@@ -235,6 +408,8 @@ class DiscordBot(commands.Bot):
         :param context: The context of the normal command that failed executing.
         :param error: The error that has been faced.
         """
+        self.profiler.stop(getattr(context, "profile", None))
+        record_context(context, failed=True)
         if isinstance(error, commands.CommandOnCooldown):
             minutes, seconds = divmod(error.retry_after, 60)
             hours, minutes = divmod(minutes, 60)
@@ -292,4 +467,8 @@ class DiscordBot(commands.Bot):
 load_dotenv()
 
 bot = DiscordBot()
-bot.run(token=getenv("TOKEN"), log_handler=None)
+log_listener.start()
+try:
+    bot.run(token=getenv("TOKEN"), log_handler=None)
+finally:
+    log_listener.stop()
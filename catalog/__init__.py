@@ -0,0 +1,338 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from hashlib import sha256
+from json import loads
+from logging import Logger
+from os import stat
+from os.path import splitext
+from typing import Dict, List, Optional, Tuple
+
+from catalog.breeding import BreedingEngine
+from catalog.models import GameData
+from catalog.records import Element, IncubationTable, Island, Monster
+from catalog.search import NameIndex
+from catalog.snapshot import read_snapshot, write_snapshot
+
+
+class Catalog:
+    def __init__(
+        self,
+        data: dict,
+        source_hash: Optional[str] = None,
+    ) -> None:
+        """
+        Builds the catalog and all of its lookup indexes from the raw game data.
+
+        :param data: The parsed contents of `data.json`.
+        :param source_hash: The content hash of the file the data was read from, if any.
+        """
+        self.source_hash = source_hash
+        game_data = GameData(**data)  # noqa
+        self.elements: List[Element] = []
+        self.islands: List[Island] = []
+        self.monsters: List[Monster] = []
+        self.incubations = IncubationTable()
+        self._elements_by_name: Dict[str, Element] = {}
+        self._islands_by_name: Dict[str, Island] = {}
+        self._monster_ids_by_name: Dict[str, int] = {}
+        self._monster_ids_by_island: Dict[int, List[int]] = {}
+        self._monsters_by_incubation: Dict[Tuple[int, bool, bool], List[Monster]] = {}
+        self._durations_by_variant: Dict[Tuple[bool, bool], array] = {}
+        self._monsters_by_variant: Dict[Tuple[bool, bool], List[Monster]] = {}
+
+        for element in game_data.elements:
+            element = Element(
+                id=len(self.elements),
+                name=element.name,
+                description=element.description,
+                wiki_url=element.wiki_url,
+            )
+            self.elements.append(element)
+            self._elements_by_name[element.name.lower()] = element
+        for island in game_data.islands:
+            island = Island(
+                id=len(self.islands),
+                name=island.name,
+                description=island.description,
+                wiki_url=island.wiki_url,
+            )
+            self.islands.append(island)
+            self._islands_by_name[island.name.lower()] = island
+        for monster in game_data.monsters:
+            incubation_start = len(self.incubations)
+            for incubation in monster.breeding_incubation:
+                self.incubations.append(
+                    incubation.duration, incubation.enhanced, incubation.skin_boost
+                )
+            monster = Monster(
+                id=len(self.monsters),
+                name=monster.name,
+                elements=tuple(
+                    self._resolve(self._elements_by_name, "element", monster.name, name)
+                    for name in monster.elements
+                ),
+                islands=tuple(
+                    self._resolve(self._islands_by_name, "island", monster.name, name)
+                    for name in monster.islands
+                ),
+                description=monster.description,
+                wiki_url=monster.wiki_url,
+                incubations=self.incubations,
+                incubation_start=incubation_start,
+                incubation_stop=len(self.incubations),
+            )
+            self._monster_ids_by_name[monster.name.lower()] = monster.id
+            for island in monster.islands:
+                self._monster_ids_by_island.setdefault(island.id, []).append(monster.id)
+            self.monsters.append(monster)
+            for index in range(monster.incubation_start, monster.incubation_stop):
+                self._monsters_by_incubation.setdefault(
+                    self._incubation_key(index), []
+                ).append(monster)
+        variants: Dict[Tuple[bool, bool], List[Tuple[int, int]]] = {}
+        for (duration, enhanced, skin_boost), monsters in sorted(
+            self._monsters_by_incubation.items()
+        ):
+            variants.setdefault((enhanced, skin_boost), []).extend(
+                (duration, monster.id) for monster in monsters
+            )
+        for variant, entries in variants.items():
+            self._durations_by_variant[variant] = array(
+                "I", (duration for duration, _ in entries)
+            )
+            self._monsters_by_variant[variant] = [
+                self.monsters[monster_id] for _, monster_id in entries
+            ]
+        self.breeding = BreedingEngine(
+            [element.name for element in self.elements],
+            [
+                [element.name for element in monster.elements]
+                for monster in self.monsters
+            ],
+        )
+        self.monster_names = NameIndex([monster.name for monster in self.monsters])
+        self.island_names = NameIndex([island.name for island in self.islands])
+
+    @staticmethod
+    def _resolve(records: dict, kind: str, monster_name: str, name: str):
+        record = records.get(name.lower())
+        if record is None:
+            raise ValueError(f"Monster '{monster_name}' has an unknown {kind} '{name}'")
+        return record
+
+    def _incubation_key(self, index: int) -> Tuple[int, bool, bool]:
+        flags = self.incubations.flags[index]
+        return (
+            self.incubations.durations[index],
+            bool(flags & IncubationTable.ENHANCED),
+            bool(flags & IncubationTable.SKIN_BOOST),
+        )
+
+    def get_element_by_name(self, name: str) -> Optional[Element]:
+        return self._elements_by_name.get(name.lower())
+
+    def get_island_by_name(self, name: str) -> Optional[Island]:
+        return self._islands_by_name.get(name.lower())
+
+    def get_monster_id(self, name: str) -> Optional[int]:
+        return self._monster_ids_by_name.get(name.lower())
+
+    def get_monster_by_name(self, name: str) -> Optional[Monster]:
+        monster_id = self.get_monster_id(name)
+        return self.monsters[monster_id] if monster_id is not None else None
+
+    def search_monsters(self, query: str, limit: int = 25) -> List[Monster]:
+        """
+        Searches the monsters by name, best matches first.
+
+        :param query: The (partial) monster name to search for.
+        :param limit: The maximum number of monsters to return.
+        :return: The matching monsters.
+        """
+        return [
+            self.monsters[monster_id]
+            for monster_id in self.monster_names.search(query, limit)
+        ]
+
+    def search_islands(self, query: str, limit: int = 25) -> List[Island]:
+        """
+        Searches the islands by name, best matches first.
+
+        :param query: The (partial) island name to search for.
+        :param limit: The maximum number of islands to return.
+        :return: The matching islands.
+        """
+        return [
+            self.islands[island_id]
+            for island_id in self.island_names.search(query, limit)
+        ]
+
+    def get_monster_ids_on_island(self, island: Island) -> List[int]:
+        return list(self._monster_ids_by_island.get(island.id, []))
+
+    def find_monster_by_breeding_time(
+        self, duration: timedelta, enhanced: bool, skin_boost: bool
+    ) -> List[Monster]:
+        return list(
+            self._monsters_by_incubation.get(
+                (int(duration.total_seconds()), enhanced, skin_boost), []
+            )
+        )
+
+    def _ranked_breeding_times(
+        self, variant: Tuple[bool, bool], seconds: int, indexes: List[int]
+    ) -> List[Tuple[Monster, timedelta]]:
+        durations = self._durations_by_variant[variant]
+        monsters = self._monsters_by_variant[variant]
+        result = []
+        seen = set()
+        for index in sorted(
+            indexes, key=lambda index: (abs(durations[index] - seconds), index)
+        ):
+            if monsters[index] not in seen:
+                seen.add(monsters[index])
+                result.append((monsters[index], timedelta(seconds=durations[index])))
+        return result
+
+    def find_monsters_by_breeding_time_range(
+        self,
+        duration: timedelta,
+        enhanced: bool,
+        skin_boost: bool,
+        tolerance: timedelta,
+    ) -> List[Tuple[Monster, timedelta]]:
+        """
+        Finds the monsters with a breeding time within a tolerance of a duration.
+
+        :param duration: The breeding duration.
+        :param enhanced: Whether the breeding is enhanced.
+        :param skin_boost: Whether the breeding has a skin boost.
+        :param tolerance: The maximum difference with the breeding duration.
+        :return: The matching monsters with their breeding time, closest first.
+        """
+        variant = (enhanced, skin_boost)
+        durations = self._durations_by_variant.get(variant)
+        if durations is None:
+            return []
+        seconds = int(duration.total_seconds())
+        tolerance = int(tolerance.total_seconds())
+        start = bisect_left(durations, seconds - tolerance)
+        stop = bisect_right(durations, seconds + tolerance)
+        return self._ranked_breeding_times(variant, seconds, list(range(start, stop)))
+
+    def find_closest_monsters_by_breeding_time(
+        self, duration: timedelta, enhanced: bool, skin_boost: bool, limit: int = 5
+    ) -> List[Tuple[Monster, timedelta]]:
+        """
+        Finds the monsters with the breeding times closest to a duration.
+
+        :param duration: The breeding duration.
+        :param enhanced: Whether the breeding is enhanced.
+        :param skin_boost: Whether the breeding has a skin boost.
+        :param limit: The maximum number of breeding times to consider.
+        :return: The closest monsters with their breeding time, closest first.
+        """
+        variant = (enhanced, skin_boost)
+        durations = self._durations_by_variant.get(variant)
+        if durations is None:
+            return []
+        seconds = int(duration.total_seconds())
+        left = bisect_left(durations, seconds) - 1
+        right = left + 1
+        indexes = []
+        while len(indexes) < limit and (left >= 0 or right < len(durations)):
+            if right >= len(durations) or (
+                left >= 0 and seconds - durations[left] <= durations[right] - seconds
+            ):
+                indexes.append(left)
+                left -= 1
+            else:
+                indexes.append(right)
+                right += 1
+        return self._ranked_breeding_times(variant, seconds, indexes)
+
+    def find_monster_by_elements(self, elements: List[Element]) -> List[Monster]:
+        """
+        Finds every monster that has at least all the given elements.
+
+        :param elements: The elements the monsters should have.
+        :return: The matching monsters.
+        """
+        mask = self.breeding.mask(element.name for element in elements)
+        return [
+            self.monsters[monster_id] for monster_id in self.breeding.supersets(mask)
+        ]
+
+    def breed(self, monster1_id: int, monster2_id: int) -> List[Monster]:
+        """
+        Determines the monsters that can result from breeding two monsters.
+
+        :param monster1_id: The ID of the first monster.
+        :param monster2_id: The ID of the second monster.
+        :return: The resulting monsters.
+        """
+        return [
+            self.monsters[monster_id]
+            for monster_id in self.breeding.breed(monster1_id, monster2_id)
+        ]
+
+    def breed_all(self, monster_ids: List[int]) -> List[Monster]:
+        """
+        Determines every distinct monster that can result from breeding any two
+        of the given monsters.
+
+        :param monster_ids: The IDs of the available monsters.
+        :return: The resulting monsters.
+        """
+        return [
+            self.monsters[monster_id]
+            for monster_id in self.breeding.breed_all(monster_ids)
+        ]
+
+
+def load_catalog(data_path: str, logger: Optional[Logger] = None) -> Catalog:
+    """
+    Loads the catalog of a game data file.
+
+    The fully built catalog is compiled into a snapshot next to the data file.
+    As long as the data file is unchanged, the snapshot is loaded instead, which
+    skips parsing, validation and indexing. This function blocks, so it should
+    be run in a worker thread when called from the event loop.
+
+    :param data_path: The path of the game data file.
+    :param logger: The logger to report snapshot problems to, if any.
+    :return: The fully built catalog.
+    """
+    snapshot_path = f"{splitext(data_path)[0]}.snapshot"
+    data_stat = stat(data_path)
+    snapshot = read_snapshot(snapshot_path)
+    if snapshot is not None and snapshot.matches_stat(data_stat):
+        try:
+            return snapshot.load()
+        except Exception as e:
+            if logger is not None:
+                logger.warning(
+                    f"Could not load the catalog snapshot\n{type(e).__name__}: {e}"
+                )
+            snapshot = None
+
+    with open(data_path, "rb") as file:
+        data_bytes = file.read()
+    source_digest = sha256(data_bytes).digest()
+    catalog = None
+    if snapshot is not None and snapshot.source_digest == source_digest:
+        try:
+            catalog = snapshot.load()
+        except Exception:  # noqa
+            catalog = None
+    if catalog is None:
+        catalog = Catalog(loads(data_bytes), source_digest.hex())
+    try:
+        write_snapshot(snapshot_path, catalog, data_stat, source_digest)
+    except OSError as e:
+        if logger is not None:
+            logger.warning(
+                f"Could not write the catalog snapshot\n{type(e).__name__}: {e}"
+            )
+    return catalog
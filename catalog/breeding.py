@@ -0,0 +1,128 @@
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+
+class BreedingEngine:
+    def __init__(
+        self,
+        element_names: Iterable[str],
+        monster_elements: Iterable[Iterable[str]],
+    ) -> None:
+        """
+        Encodes every element as a bit and every monster as the mask of its
+        elements, then builds the breeding result of every monster pair.
+
+        :param element_names: The names of all known elements, in catalog order.
+        :param monster_elements: The element names of each monster, indexed by monster ID.
+        """
+        self.bits: Dict[str, int] = {
+            name: 1 << index for index, name in enumerate(element_names)
+        }
+        self.masks: List[int] = [self.mask(names) for names in monster_elements]
+        self._monsters_by_mask: Dict[int, Tuple[int, ...]] = {}
+        for monster_id, mask in enumerate(self.masks):
+            self._monsters_by_mask[mask] = self._monsters_by_mask.get(mask, ()) + (
+                monster_id,
+            )
+        self.superset_table: Dict[int, Tuple[int, ...]] = {}
+        self.results, self.pair_table = self._build_pair_table()
+
+    def _build_pair_table(self) -> Tuple[List[Tuple[int, ...]], array]:
+        """
+        Builds the result of every unordered monster pair.
+
+        The table is a flat triangular array holding, for each pair, an index
+        into the list of distinct results.
+        """
+        results: List[Tuple[int, ...]] = []
+        result_indexes: Dict[int, int] = {}
+        table = array("I")
+        for monster1_id, mask1 in enumerate(self.masks):
+            for mask2 in self.masks[: monster1_id + 1]:
+                combined = mask1 | mask2
+                result_index = result_indexes.get(combined)
+                if result_index is None:
+                    result_index = result_indexes[combined] = len(results)
+                    results.append(self.supersets(combined))
+                table.append(result_index)
+        return results, table
+
+    def mask(self, element_names: Iterable[str]) -> int:
+        mask = 0
+        for name in element_names:
+            mask |= self.bits[name]
+        return mask
+
+    def element_names(self, mask: int) -> List[str]:
+        return [name for name, bit in self.bits.items() if mask & bit]
+
+    def exact(self, mask: int) -> Tuple[int, ...]:
+        """
+        Gets the IDs of the monsters that have exactly the elements of the mask.
+        """
+        return self._monsters_by_mask.get(mask, ())
+
+    def supersets(self, mask: int) -> Tuple[int, ...]:
+        """
+        Gets the IDs of the monsters that have at least all the elements of the mask.
+        """
+        result = self.superset_table.get(mask)
+        if result is None:
+            result = self.superset_table[mask] = tuple(
+                sorted(
+                    monster_id
+                    for monster_mask, monster_ids in self._monsters_by_mask.items()
+                    if monster_mask & mask == mask
+                    for monster_id in monster_ids
+                )
+            )
+        return result
+
+    def subsets(self, mask: int) -> Tuple[int, ...]:
+        """
+        Gets the IDs of the monsters whose elements are all contained in the mask.
+        """
+        return tuple(
+            sorted(
+                monster_id
+                for monster_mask, monster_ids in self._monsters_by_mask.items()
+                if monster_mask & mask == monster_mask
+                for monster_id in monster_ids
+            )
+        )
+
+    def breed(self, monster1_id: int, monster2_id: int) -> Tuple[int, ...]:
+        """
+        Gets the IDs of the monsters that can result from breeding two monsters.
+
+        :param monster1_id: The ID of the first monster.
+        :param monster2_id: The ID of the second monster.
+        """
+        if monster1_id < monster2_id:
+            monster1_id, monster2_id = monster2_id, monster1_id
+        return self.results[
+            self.pair_table[monster1_id * (monster1_id + 1) // 2 + monster2_id]
+        ]
+
+    def breed_all(self, monster_ids: Iterable[int]) -> Tuple[int, ...]:
+        """
+        Gets the IDs of every monster that can result from breeding any two of
+        the given monsters.
+
+        Monsters with the same elements breed the same results, so the pairs
+        are formed over the distinct masks rather than over the monsters.
+
+        :param monster_ids: The IDs of the monsters that are available.
+        """
+        counts: Dict[int, int] = {}
+        for monster_id in monster_ids:
+            mask = self.masks[monster_id]
+            counts[mask] = counts.get(mask, 0) + 1
+        masks = list(counts)
+        result = set()
+        for index, mask1 in enumerate(masks):
+            if counts[mask1] > 1:
+                result.update(self.supersets(mask1))
+            for mask2 in masks[index + 1 :]:
+                result.update(self.supersets(mask1 | mask2))
+        return tuple(sorted(result))
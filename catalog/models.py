@@ -0,0 +1,42 @@
+from typing import List
+
+from pydantic import NonNegativeInt
+from pydantic.dataclasses import dataclass
+
+
+@dataclass
+class ElementData:
+    name: str
+    description: str
+    wiki_url: str
+
+
+@dataclass
+class IslandData:
+    name: str
+    description: str
+    wiki_url: str
+
+
+@dataclass
+class BreedingIncubationData:
+    duration: NonNegativeInt
+    enhanced: bool
+    skin_boost: bool
+
+
+@dataclass
+class MonsterData:
+    name: str
+    elements: List[str]
+    islands: List[str]
+    description: str
+    breeding_incubation: List[BreedingIncubationData]
+    wiki_url: str
+
+
+@dataclass
+class GameData:
+    elements: List[ElementData]
+    islands: List[IslandData]
+    monsters: List[MonsterData]
@@ -0,0 +1,117 @@
+from array import array
+from datetime import timedelta
+from typing import List, NamedTuple, Tuple
+
+
+class Record:
+    """
+    Base class for the read-only catalog records.
+
+    Records are only created once per catalog and shared by every index, so
+    they compare by identity.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs) -> None:
+        for slot, value in zip(self.__slots__, args):
+            object.__setattr__(self, slot, value)
+        for slot, value in kwargs.items():
+            if slot not in self.__slots__:
+                raise TypeError(f"'{type(self).__name__}' has no field '{slot}'")
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError(f"'{type(self).__name__}' records are read-only")
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.id!r}, name={self.name!r})"  # noqa
+
+
+class Element(Record):
+    __slots__ = ("id", "name", "description", "wiki_url")
+
+    id: int
+    name: str
+    description: str
+    wiki_url: str
+
+
+class Island(Record):
+    __slots__ = ("id", "name", "description", "wiki_url")
+
+    id: int
+    name: str
+    description: str
+    wiki_url: str
+
+
+class BreedingIncubation(NamedTuple):
+    duration: timedelta
+    enhanced: bool
+    skin_boost: bool
+
+
+class IncubationTable:
+    """
+    The breeding/incubation times of every monster, packed into shared arrays.
+    """
+
+    __slots__ = ("durations", "flags")
+
+    ENHANCED = 1
+    SKIN_BOOST = 2
+
+    def __init__(self) -> None:
+        self.durations = array("I")
+        self.flags = array("B")
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def append(self, duration: int, enhanced: bool, skin_boost: bool) -> None:
+        self.durations.append(duration)
+        self.flags.append(
+            (self.ENHANCED if enhanced else 0) | (self.SKIN_BOOST if skin_boost else 0)
+        )
+
+    def get(self, start: int, stop: int) -> List[BreedingIncubation]:
+        return [
+            BreedingIncubation(
+                duration=timedelta(seconds=self.durations[index]),
+                enhanced=bool(self.flags[index] & self.ENHANCED),
+                skin_boost=bool(self.flags[index] & self.SKIN_BOOST),
+            )
+            for index in range(start, stop)
+        ]
+
+
+class Monster(Record):
+    __slots__ = (
+        "id",
+        "name",
+        "elements",
+        "islands",
+        "description",
+        "wiki_url",
+        "incubations",
+        "incubation_start",
+        "incubation_stop",
+    )
+
+    id: int
+    name: str
+    elements: Tuple[Element, ...]
+    islands: Tuple[Island, ...]
+    description: str
+    wiki_url: str
+    incubations: IncubationTable
+    incubation_start: int
+    incubation_stop: int
+
+    @property
+    def breeding_incubation(self) -> List[BreedingIncubation]:
+        return self.incubations.get(self.incubation_start, self.incubation_stop)
@@ -0,0 +1,92 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+
+class NameIndex:
+    def __init__(self, names: List[str]) -> None:
+        """
+        Builds a case-insensitive search index over a list of names.
+
+        Names are kept in a sorted array for prefix matches, and every 1, 2 and
+        3 character slice of each name gets a postings set for substring and
+        fuzzy matches.
+
+        :param names: The names to index, indexed by ID.
+        """
+        entries = sorted((name.lower(), name_id) for name_id, name in enumerate(names))
+        self._keys: List[str] = [key for key, _ in entries]
+        self._ids: List[int] = [name_id for _, name_id in entries]
+        self._names: List[str] = [name.lower() for name in names]
+        self._grams: Dict[str, Set[int]] = {}
+        for name_id, name in enumerate(self._names):
+            for size in range(1, 4):
+                for start in range(len(name) - size + 1):
+                    self._grams.setdefault(name[start : start + size], set()).add(
+                        name_id
+                    )
+
+    @staticmethod
+    def _trigrams(text: str) -> Set[str]:
+        return {text[start : start + 3] for start in range(len(text) - 2)}
+
+    def search(self, query: str, limit: int = 25) -> List[int]:
+        """
+        Searches the index, ranking prefix matches first, then substring
+        matches, then fuzzy matches.
+
+        :param query: The text to search for.
+        :param limit: The maximum number of results.
+        :return: The IDs of the matching names.
+        """
+        query = query.strip().lower()
+        if not query:
+            return self._ids[:limit]
+
+        result = []
+        position = bisect_left(self._keys, query)
+        while (
+            len(result) < limit
+            and position < len(self._keys)
+            and self._keys[position].startswith(query)
+        ):
+            result.append(self._ids[position])
+            position += 1
+        if len(result) >= limit:
+            return result
+        seen = set(result)
+
+        if len(query) <= 3:
+            candidates = self._grams.get(query, set())
+        else:
+            postings = sorted(
+                (self._grams.get(trigram, set()) for trigram in self._trigrams(query)),
+                key=len,
+            )
+            candidates = set.intersection(*postings)
+        substring_matches = sorted(
+            (self._names[name_id].find(query), self._names[name_id], name_id)
+            for name_id in candidates
+            if name_id not in seen and query in self._names[name_id]
+        )
+        for _, _, name_id in substring_matches[: limit - len(result)]:
+            result.append(name_id)
+            seen.add(name_id)
+        if len(result) >= limit or len(query) < 3:
+            return result
+
+        trigrams = self._trigrams(query)
+        scores = Counter(
+            name_id
+            for trigram in trigrams
+            for name_id in self._grams.get(trigram, ())
+            if name_id not in seen
+        )
+        threshold = max(1, len(trigrams) // 2)
+        fuzzy_matches: List[Tuple[int, str, int]] = sorted(
+            (-score, self._names[name_id], name_id)
+            for name_id, score in scores.items()
+            if score >= threshold
+        )
+        result.extend(name_id for _, _, name_id in fuzzy_matches[: limit - len(result)])
+        return result
@@ -0,0 +1,95 @@
+from functools import lru_cache
+from hashlib import sha256
+from os import listdir, replace, stat_result
+from os.path import dirname, realpath
+from pickle import HIGHEST_PROTOCOL, dumps, loads
+from struct import Struct
+from typing import NamedTuple, Optional
+
+SNAPSHOT_MAGIC = b"HBSN"
+SNAPSHOT_VERSION = 4  # Bump whenever the layout of the snapshot header changes.
+SNAPSHOT_HEADER = Struct("<4sHQQ32s32s")
+
+
+@lru_cache(maxsize=1)
+def code_digest() -> bytes:
+    """
+    Hashes the source of the catalog package, so snapshots pickled by other
+    code, which may have a different object layout, are never loaded.
+    """
+    directory = realpath(dirname(__file__))
+    digest = sha256()
+    for name in sorted(listdir(directory)):
+        if name.endswith(".py"):
+            with open(f"{directory}/{name}", "rb") as file:
+                digest.update(name.encode() + b"\0" + file.read() + b"\0")
+    return digest.digest()
+
+
+class Snapshot(NamedTuple):
+    mtime_ns: int
+    size: int
+    source_digest: bytes
+    payload: memoryview
+
+    def matches_stat(self, data_stat: stat_result) -> bool:
+        return (self.mtime_ns, self.size) == (data_stat.st_mtime_ns, data_stat.st_size)
+
+    def load(self):
+        return loads(self.payload)
+
+
+def read_snapshot(path: str) -> Optional[Snapshot]:
+    """
+    Reads a compiled catalog snapshot with a single read.
+
+    Snapshots are only ever written by the bot itself, from its own data file.
+
+    :param path: The path of the snapshot file.
+    :return: The snapshot, or `None` if it is missing, from another format version or from other catalog code.
+    """
+    try:
+        with open(path, "rb") as file:
+            content = file.read()
+    except OSError:
+        return None
+    if len(content) < SNAPSHOT_HEADER.size:
+        return None
+    magic, version, mtime_ns, size, source_digest, snapshot_code_digest = (
+        SNAPSHOT_HEADER.unpack_from(content)
+    )
+    if (
+        magic != SNAPSHOT_MAGIC
+        or version != SNAPSHOT_VERSION
+        or snapshot_code_digest != code_digest()
+    ):
+        return None
+    return Snapshot(
+        mtime_ns, size, source_digest, memoryview(content)[SNAPSHOT_HEADER.size :]
+    )
+
+
+def write_snapshot(
+    path: str, catalog, data_stat: stat_result, source_digest: bytes
+) -> None:
+    """
+    Writes a compiled catalog snapshot, replacing any previous one atomically.
+
+    :param path: The path of the snapshot file.
+    :param catalog: The fully built catalog.
+    :param data_stat: The stat of the data file the catalog was built from.
+    :param source_digest: The SHA-256 digest of the data file content.
+    """
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(
+            SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC,
+                SNAPSHOT_VERSION,
+                data_stat.st_mtime_ns,
+                data_stat.st_size,
+                source_digest,
+                code_digest(),
+            )
+        )
+        file.write(dumps(catalog, protocol=HIGHEST_PROTOCOL))
+    replace(f"{path}.tmp", path)
@@ -1,41 +1,20 @@
+from asyncio import Lock, to_thread
 from datetime import timedelta
-from typing import List, Optional
+from functools import lru_cache, partial
+from os import stat
+from typing import List, Optional, Tuple
 
 from discord import app_commands, Interaction, User, Embed
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ext.commands import Context, Bot
-from pydantic.dataclasses import dataclass
 
+from catalog import Catalog, load_catalog
+from views import EMBED_DESCRIPTION_LIMIT, build_pages, send_pages
 
-@dataclass
-class Element:
-    name: str
-    description: str
-    wiki_url: str
-
-
-@dataclass
-class Island:
-    name: str
-    description: str
-    wiki_url: str
-
-
-@dataclass
-class BreedingIncubation:
-    duration: timedelta
-    enhanced: bool
-    skin_boost: bool
-
-
-@dataclass
-class Monster:
-    name: str
-    elements: List[Element]
-    islands: List[Island]
-    description: str
-    breeding_incubation: List[BreedingIncubation]
-    wiki_url: str
+AUTOCOMPLETE_CACHE_SIZE = 1024
+BREEDING_TIME_RESULTS = 10
+BREEDING_TIME_PER_PAGE = 5
+RESULTS_PER_PAGE = 10
 
 
 class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
@@ -45,78 +24,94 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
             name="Get BBB ID", callback=self.get_bbb_id
         )
         self.bot.tree.add_command(self.context_menu_user)
-        self.elements = []
-        self.islands = []
-        self.monsters = []
-        self.load_data()
-
-    def load_data(self):
-        self.elements = [
-            Element(**element) for element in self.bot.data["elements"]  # noqa
-        ]
-        self.islands = [Island(**island) for island in self.bot.data["islands"]]  # noqa
-        self.monsters = [
-            Monster(
-                name=monster["name"],
-                elements=[
-                    self.get_element_by_name(name) for name in monster["elements"]
-                ],
-                islands=[self.get_island_by_name(name) for name in monster["islands"]],
-                description=monster["description"],
-                breeding_incubation=[
-                    BreedingIncubation(
-                        duration=timedelta(seconds=incubation["duration"]),
-                        enhanced=incubation["enhanced"],
-                        skin_boost=incubation["skin_boost"],
-                    )
-                    for incubation in monster["breeding_incubation"]
-                ],
-                wiki_url=monster["wiki_url"],
+        self.catalog: Optional[Catalog] = None
+        self.monster_choices: List[app_commands.Choice[str]] = []
+        self.autocomplete_choices = None
+        self.reload_lock = Lock()
+        self.data_stat: Optional[Tuple[int, int]] = None
+
+    async def cog_load(self) -> None:
+        await self.load_data()
+        interval = self.bot.config.get("data_watch_interval", 0)  # noqa
+        if interval > 0:
+            self.watch_data.change_interval(seconds=interval)
+            self.watch_data.start()
+
+    async def cog_unload(self) -> None:
+        self.watch_data.cancel()
+
+    def get_data_stat(self) -> Tuple[int, int]:
+        data_stat = stat(self.bot.data_path)  # noqa
+        return data_stat.st_mtime_ns, data_stat.st_size
+
+    async def load_data(self) -> Catalog:
+        """
+        Loads the game data in a worker thread and swaps the new catalog in.
+
+        The running commands keep using the catalog they started with, so they
+        never see a partially built one.
+
+        :return: The newly loaded catalog.
+        """
+        async with self.reload_lock:
+            data_stat = self.get_data_stat()
+            catalog = await to_thread(
+                load_catalog, self.bot.data_path, self.bot.logger  # noqa
             )
-            for monster in self.bot.data["monsters"]  # noqa
-        ]
+            monster_choices = [
+                app_commands.Choice(name=monster.name, value=monster.name)
+                for monster in catalog.monsters
+            ]
+            self.catalog = catalog
+            self.monster_choices = monster_choices
+            self.autocomplete_choices = lru_cache(maxsize=AUTOCOMPLETE_CACHE_SIZE)(
+                partial(self.search_choices, catalog, monster_choices)
+            )
+            self.data_stat = data_stat
+        return catalog
+
+    @tasks.loop(seconds=30.0)
+    async def watch_data(self) -> None:
+        """
+        Reloads the game data whenever the file changes on disk.
+        """
+        try:
+            data_stat = self.get_data_stat()
+        except OSError:
+            return
+        if data_stat == self.data_stat:
+            return
+        try:
+            catalog = await self.load_data()
+        except Exception as e:
+            self.data_stat = data_stat
+            exception = f"{type(e).__name__}: {e}"
+            self.bot.logger.error(  # noqa
+                f"Failed to reload the game data, keeping the current catalog\n{exception}"
+            )
+            return
+        self.bot.logger.info(  # noqa
+            f"Reloaded the game data ({len(catalog.monsters)} monsters)"
+        )
 
-    def get_element_by_name(self, name: str) -> Optional[Element]:
-        for element in self.elements:
-            if element.name == name:
-                return element
-        return None
-
-    def get_island_by_name(self, name: str) -> Optional[Island]:
-        for island in self.islands:
-            if island.name == name:
-                return island
-        return None
-
-    def find_monster_by_breeding_time(
-        self, duration: timedelta, enhanced: bool, skin_boost: bool
-    ) -> List[Monster]:
-        result = []
-        for monster in self.monsters:
-            for incubation in monster.breeding_incubation:
-                if (
-                    incubation.duration == duration
-                    and incubation.enhanced == enhanced
-                    and incubation.skin_boost == skin_boost
-                ):
-                    result.append(monster)
-        return result
-
-    def combine_elements(
-        self, elements1: List[Element], elements2: List[Element]
-    ) -> List[Element]:
-        combined_elements = {element.name: element for element in elements1}
-        for element in elements2:
-            if element.name not in combined_elements:
-                combined_elements[element.name] = element
-        return list(combined_elements.values())
-
-    def find_monster_by_elements(self, elements: List[Element]) -> List[Monster]:
-        result = []
-        for monster in self.monsters:
-            if all(element in monster.elements for element in elements):
-                result.append(monster)
-        return result
+    @staticmethod
+    def search_choices(
+        catalog: Catalog,
+        monster_choices: List[app_commands.Choice[str]],
+        query: str,
+    ) -> Tuple[app_commands.Choice[str], ...]:
+        """
+        Gets the autocomplete choices for a normalized query.
+
+        :param catalog: The catalog to search.
+        :param monster_choices: The prebuilt choices of the catalog's monsters.
+        :param query: The stripped, lowercase query.
+        :return: The prebuilt choices of the matching monsters.
+        """
+        return tuple(
+            monster_choices[monster_id]
+            for monster_id in catalog.monster_names.search(query)
+        )
 
     def parse_duration(self, duration_str: str) -> timedelta:
         parts = duration_str.split(":")
@@ -161,6 +156,7 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
         duration="The breeding duration (format: HH:MM:SS or MM:SS or SS).",
         enhanced="Whether the breeding is enhanced.",
         skin_boost="Whether the breeding has a skin boost.",
+        tolerance="How many seconds the breeding duration may be off (default: 0).",
     )
     @app_commands.choices(
         enhanced=[
@@ -173,7 +169,12 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
         ],
     )
     async def breeding_time(
-        self, context: Context, duration: str, enhanced: int, skin_boost: int
+        self,
+        context: Context,
+        duration: str,
+        enhanced: int,
+        skin_boost: int,
+        tolerance: commands.Range[int, 0, 86400] = 0,
     ) -> None:
         """
         Find the monster based on breeding time and conditions.
@@ -182,6 +183,7 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
         :param duration: The breeding duration (format: HH:MM:SS or MM:SS or SS).
         :param enhanced: Whether the breeding is enhanced.
         :param skin_boost: Whether the breeding has a skin boost.
+        :param tolerance: How many seconds the breeding duration may be off.
         """
         try:
             breeding_duration = self.parse_duration(duration)
@@ -196,27 +198,54 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
             )
             return
 
-        monsters = self.find_monster_by_breeding_time(
-            breeding_duration, bool(enhanced), bool(skin_boost)
-        )
-        if len(monsters) == 1:
-            elements = ", ".join([element.name for element in monsters[0].elements])
-            islands = ", ".join([island.name for island in monsters[0].islands])
-            description = f"The matching monster bred with a duration of ({breeding_duration}), enhanced: {bool(enhanced)}, skin_boost: {bool(skin_boost)}: **[{monsters[0].name}]({monsters[0].wiki_url})**.\n\n**Elements:**\n{elements}\n\n**Islands:**\n{islands}"
-        elif len(monsters) > 1:
-            description = f"Multiple monsters match the criteria with a duration of ({breeding_duration}), enhanced: {bool(enhanced)}, skin_boost: {bool(skin_boost)}:\n"
-            for monster in monsters:
+        catalog = self.catalog
+        matches = catalog.find_monsters_by_breeding_time_range(
+            breeding_duration,
+            bool(enhanced),
+            bool(skin_boost),
+            timedelta(seconds=tolerance),
+        )[:BREEDING_TIME_RESULTS]
+        criteria = f"a duration of ({breeding_duration}){f' ± {tolerance}s' if tolerance else ''}, enhanced: {bool(enhanced)}, skin_boost: {bool(skin_boost)}"
+        if len(matches) == 1:
+            monster, monster_duration = matches[0]
+            elements = ", ".join([element.name for element in monster.elements])
+            islands = ", ".join([island.name for island in monster.islands])
+            description = f"The matching monster bred with {criteria}: **[{monster.name}]({monster.wiki_url})** ({monster_duration}).\n\n**Elements:**\n{elements}\n\n**Islands:**\n{islands}"
+        elif len(matches) > 1:
+            entries = []
+            for monster, monster_duration in matches:
                 elements = ", ".join(
                     [element.name for element in monster.elements]  # noqa
                 )
                 islands = ", ".join([island.name for island in monster.islands])  # noqa
-                description += f"\n**[{monster.name}]({monster.wiki_url})**.\n\n**Elements:**\n{elements}\n\n**Islands:**\n{islands}"
+                entries.append(
+                    f"\n**[{monster.name}]({monster.wiki_url})** ({monster_duration}).\n\n**Elements:**\n{elements}\n\n**Islands:**\n{islands}\n"
+                )
+            pages = build_pages(
+                "Breeding Result",
+                f"Multiple monsters match the criteria with {criteria}, closest first:\n",
+                entries,
+                BREEDING_TIME_PER_PAGE,
+                0xBEBEFE,
+            )
+            await send_pages(context, pages)
+            return
         else:
-            description = f"No monsters match the criteria with a duration of ({breeding_duration}), enhanced: {bool(enhanced)}, skin_boost: {bool(skin_boost)}."
+            closest = catalog.find_closest_monsters_by_breeding_time(
+                breeding_duration, bool(enhanced), bool(skin_boost)
+            )
+            description = f"No monsters match the criteria with {criteria}."
+            if closest:
+                description += "\n\n**Closest breeding times:**\n" + "\n".join(
+                    [
+                        f"[{monster.name}]({monster.wiki_url}): {monster_duration}"
+                        for monster, monster_duration in closest
+                    ]
+                )
 
         embed = Embed(
             title="Breeding Result",
-            description=description,
+            description=description[:EMBED_DESCRIPTION_LIMIT],
             color=0xBEBEFE,
         )
         await context.send(embed=embed, ephemeral=True)
@@ -239,20 +268,16 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
         :param monster1: The name of the first monster.
         :param monster2: The name of the second monster.
         """
-        monster1_obj = next(
-            (monster for monster in self.monsters if monster.name == monster1), None
-        )
-        monster2_obj = next(
-            (monster for monster in self.monsters if monster.name == monster2), None
-        )
+        catalog = self.catalog
+        monster1_id = catalog.get_monster_id(monster1)
+        monster2_id = catalog.get_monster_id(monster2)
 
-        if not monster1_obj or not monster2_obj:
+        if monster1_id is None or monster2_id is None:
             description = "One or both monsters not found."
         else:
-            combined_elements = self.combine_elements(
-                monster1_obj.elements, monster2_obj.elements
-            )
-            resulting_monsters = self.find_monster_by_elements(combined_elements)
+            monster1_obj = catalog.monsters[monster1_id]
+            monster2_obj = catalog.monsters[monster2_id]
+            resulting_monsters = catalog.breed(monster1_id, monster2_id)
             if len(resulting_monsters) == 1:
                 resulting_monster = resulting_monsters[0]
                 elements = ", ".join(
@@ -294,12 +319,97 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
     @breeding_combo.autocomplete("monster1")
     @breeding_combo.autocomplete("monster2")
     async def autocomplete_monster(self, interaction: Interaction, current: str):
-        choices = [
-            app_commands.Choice(name=monster.name, value=monster.name)
-            for monster in self.monsters
-            if current.lower() in monster.name.lower()
+        with self.bot.metrics.measure("autocomplete monster"):  # noqa
+            return list(self.autocomplete_choices(current.strip().lower()))
+
+    @commands.hybrid_command(
+        name="breedable",
+        description="List every monster that can be bred from a set of monsters.",
+    )
+    @app_commands.describe(
+        monsters="The names of the monsters you have, separated by commas.",
+        island="An island whose monsters should all be included.",
+    )
+    async def breedable(
+        self,
+        context: Context,
+        monsters: Optional[str] = None,
+        island: Optional[str] = None,
+    ) -> None:
+        """
+        List every monster that can be bred from a set of monsters.
+
+        :param context: The application command context.
+        :param monsters: The names of the monsters, separated by commas.
+        :param island: The name of an island whose monsters should be included.
+        """
+        catalog = self.catalog
+        monster_ids = []
+        unknown = []
+        if island:
+            island_obj = catalog.get_island_by_name(island)
+            if island_obj is None:
+                unknown.append(island)
+            else:
+                monster_ids.extend(catalog.get_monster_ids_on_island(island_obj))
+        for name in (monsters or "").split(","):
+            name = name.strip()
+            if not name:
+                continue
+            monster_id = catalog.get_monster_id(name)
+            if monster_id is None:
+                unknown.append(name)
+            else:
+                monster_ids.append(monster_id)
+
+        if unknown:
+            embed = Embed(
+                description="Unknown monster(s) or island: "
+                + ", ".join(f"`{name}`" for name in unknown),
+                color=0xE02B2B,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        if len(monster_ids) < 2:
+            embed = Embed(
+                description="Please give at least two monsters or an island.",
+                color=0xE02B2B,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+
+        results = catalog.breed_all(monster_ids)
+        if not results:
+            embed = Embed(
+                title="Breeding Result",
+                description="No monster can be bred from these monsters.",
+                color=0xBEBEFE,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        lines = [
+            f"**[{monster.name}]({monster.wiki_url})**: "
+            + ", ".join([element.name for element in monster.elements])
+            for monster in results
+        ]
+        pages = [
+            Embed(
+                title="Breeding Result",
+                description=f"{len(results)} monster(s) can be bred from {len(set(monster_ids))} monster(s):\n\n"
+                + "\n".join(lines[start : start + RESULTS_PER_PAGE]),
+                color=0xBEBEFE,
+            )
+            for start in range(0, len(lines), RESULTS_PER_PAGE)
         ]
-        return choices
+        await send_pages(context, pages)
+
+    @breedable.autocomplete("island")
+    async def autocomplete_island(self, interaction: Interaction, current: str):
+        with self.bot.metrics.measure("autocomplete island"):  # noqa
+            return [
+                app_commands.Choice(name=island.name, value=island.name)
+                for island in self.catalog.search_islands(current)
+            ]
 
     @commands.hybrid_command(
         name="link",
@@ -333,6 +443,98 @@ class MySingingMonsters(commands.Cog, name="mysingingmonsters"):
         )
         await context.send(embed=embed, ephemeral=True)
 
+    @commands.hybrid_command(
+        name="friends",
+        description="Search the linked BBB IDs (friend codes) by ID or name.",
+    )
+    @app_commands.describe(query="The (partial) BBB ID or BBB name to search for.")
+    async def friends(self, context: Context, query: str) -> None:
+        """
+        Search the linked BBB IDs (friend codes) by ID or name.
+
+        :param context: The application command context.
+        :param query: The (partial) BBB ID or BBB name to search for.
+        """
+        query = query.strip()
+        if not query:
+            embed = Embed(
+                description="Please give a BBB ID or name to search for.",
+                color=0xE02B2B,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        links = await self.bot.database.search_links(query)  # noqa
+        if not links:
+            embed = Embed(
+                title="Friends",
+                description=f"No BBB IDs or names match `{query}`.",
+                color=0xBEBEFE,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        lines = [
+            f"<@{user_id}>: `{bbb_id}` ({bbb_name})"
+            for user_id, bbb_id, bbb_name in links
+        ]
+        pages = [
+            Embed(
+                title="Friends",
+                description=f"BBB IDs and names matching `{query}`:\n\n"
+                + "\n".join(lines[start : start + RESULTS_PER_PAGE]),
+                color=0xBEBEFE,
+            )
+            for start in range(0, len(lines), RESULTS_PER_PAGE)
+        ]
+        await send_pages(context, pages)
+
+    @commands.hybrid_command(
+        name="server_friends",
+        description="List the linked BBB IDs (friend codes) of the members of this server.",
+    )
+    @commands.guild_only()
+    async def server_friends(self, context: Context) -> None:
+        """
+        List the linked BBB IDs (friend codes) of the members of this server.
+
+        :param context: The application command context.
+        """
+        await context.defer(ephemeral=True)
+        pages = []
+        lines = []
+        async for (
+            user_id,
+            bbb_id,
+            bbb_name,
+        ) in self.bot.database.get_links_for_users(  # noqa
+            member.id for member in context.guild.members
+        ):
+            lines.append(f"<@{user_id}>: `{bbb_id}` ({bbb_name})")
+            if len(lines) == RESULTS_PER_PAGE:
+                pages.append(lines)
+                lines = []
+        if lines:
+            pages.append(lines)
+        if not pages:
+            embed = Embed(
+                title="Server Friends",
+                description="Nobody in this server has linked a BBB ID yet.",
+                color=0xBEBEFE,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        await send_pages(
+            context,
+            [
+                Embed(
+                    title="Server Friends",
+                    description=f"Linked BBB IDs in {context.guild.name}:\n\n"
+                    + "\n".join(page),
+                    color=0xBEBEFE,
+                )
+                for page in pages
+            ],
+        )
+
     @commands.hybrid_command(
         name="unlink",
         description="Unlink a BBB ID (friend code) from your Discord account.",
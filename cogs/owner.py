@@ -1,9 +1,20 @@
-from sys import exit
+from csv import writer as csv_writer
+from datetime import datetime
+from io import BytesIO, TextIOWrapper
+from json import dumps
+from os import makedirs
+from tempfile import TemporaryDirectory, TemporaryFile
+from typing import Optional
 
-from discord import app_commands, Game, Embed, Status
+from discord import app_commands, Attachment, File, Game, Embed, Status
 from discord.ext import commands
 from discord.ext.commands import Context, Bot
 
+from database import LinkImportError, parse_links
+from views import send_pages
+
+STATS_PER_PAGE = 10
+
 
 class Owner(commands.Cog, name="owner"):
     def __init__(self, bot) -> None:
@@ -34,7 +45,7 @@ class Owner(commands.Cog, name="owner"):
                 await self.bot.change_presence(
                     activity=Game(name="Syncing..."), status=Status.idle
                 )
-                await self.bot.tree.sync()
+                await self.bot.command_syncer.sync(force=True)  # noqa
                 embed = Embed(
                     description="Slash commands have been globally synchronized.",
                     color=0xBEBEFE,
@@ -52,7 +63,7 @@ class Owner(commands.Cog, name="owner"):
                     activity=Game(name="Syncing..."), status=Status.idle
                 )
                 self.bot.tree.copy_global_to(guild=context.guild)
-                await self.bot.tree.sync(guild=context.guild)
+                await self.bot.command_syncer.sync(context.guild, force=True)  # noqa
                 embed = Embed(
                     description="Slash commands have been synchronized in this guild.",
                     color=0xBEBEFE,
@@ -95,7 +106,7 @@ class Owner(commands.Cog, name="owner"):
                     activity=Game(name="Syncing..."), status=Status.idle
                 )
                 self.bot.tree.clear_commands(guild=None)
-                await self.bot.tree.sync()
+                await self.bot.command_syncer.sync(force=True)  # noqa
                 embed = Embed(
                     description="Slash commands have been globally unsynchronized.",
                     color=0xBEBEFE,
@@ -113,7 +124,7 @@ class Owner(commands.Cog, name="owner"):
                     activity=Game(name="Syncing..."), status=Status.idle
                 )
                 self.bot.tree.clear_commands(guild=context.guild)
-                await self.bot.tree.sync(guild=context.guild)
+                await self.bot.command_syncer.sync(context.guild, force=True)  # noqa
                 embed = Embed(
                     description="Slash commands have been unsynchronized in this guild.",
                     color=0xBEBEFE,
@@ -156,7 +167,7 @@ class Owner(commands.Cog, name="owner"):
                     activity=Game(name="Syncing..."), status=Status.idle
                 )
                 self.bot.tree.clear_commands(guild=None)
-                await self.bot.tree.sync()
+                await self.bot.command_syncer.sync(force=True)  # noqa
                 embed = Embed(
                     description="Slash commands have been globally resynchronized.",
                     color=0xBEBEFE,
@@ -174,7 +185,7 @@ class Owner(commands.Cog, name="owner"):
                     activity=Game(name="Syncing..."), status=Status.idle
                 )
                 self.bot.tree.clear_commands(guild=context.guild)
-                await self.bot.tree.sync(guild=context.guild)
+                await self.bot.command_syncer.sync(context.guild, force=True)  # noqa
                 embed = Embed(
                     description="Slash commands have been resynchronized in this guild.",
                     color=0xBEBEFE,
@@ -272,6 +283,311 @@ class Owner(commands.Cog, name="owner"):
         )
         await context.send(embed=embed, ephemeral=True)
 
+    @commands.hybrid_command(
+        name="reload_data",
+        description="Reloads the game data without restarting the bot.",
+    )
+    @app_commands.default_permissions(administrator=True)
+    @commands.is_owner()
+    async def reload_data(self, context: Context) -> None:
+        """
+        The bot will reload `data.json` and swap in the new catalog.
+
+        :param context: The hybrid command context.
+        """
+        cog = self.bot.get_cog("mysingingmonsters")
+        if cog is None:
+            embed = Embed(
+                description="The `mysingingmonsters` cog is not loaded.",
+                color=0xE02B2B,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        await context.defer(ephemeral=True)
+        try:
+            catalog = await cog.load_data()  # noqa
+        except Exception as e:
+            embed = Embed(
+                description=f"Could not reload the game data.\n`{type(e).__name__}: {e}`",
+                color=0xE02B2B,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        embed = Embed(
+            description=f"Successfully reloaded the game data ({len(catalog.monsters)} monsters).",
+            color=0xBEBEFE,
+        )
+        await context.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(
+        name="import_links",
+        description="Imports BBB ID links from a CSV or JSON lines file.",
+    )
+    @app_commands.describe(
+        file="A .csv file with user_id,bbb_id,bbb_name rows or a .jsonl file."
+    )
+    @app_commands.default_permissions(administrator=True)
+    @commands.is_owner()
+    async def import_links(self, context: Context, file: Attachment) -> None:
+        """
+        The bot will import the BBB ID links of the given file, replacing existing links of the same users.
+
+        :param context: The hybrid command context.
+        :param file: The CSV or JSON lines file with the links.
+        """
+        file_format = file.filename.rsplit(".", 1)[-1].lower()
+        if file_format not in ("csv", "jsonl"):
+            embed = Embed(
+                description="The file must be a `.csv` or `.jsonl` file.",
+                color=0xE02B2B,
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        await context.defer(ephemeral=True)
+        skipped = []
+        with TemporaryFile() as temporary_file:
+            await file.save(temporary_file)
+            temporary_file.seek(0)
+            with TextIOWrapper(
+                temporary_file,
+                encoding="utf-8-sig",
+                errors="surrogateescape",
+                newline="",
+            ) as text:
+                try:
+                    imported = await self.bot.database.import_links(  # noqa
+                        parse_links(text, file_format, skipped)
+                    )
+                except LinkImportError as e:
+                    embed = Embed(
+                        description=f"Could not import the links, {e.imported} link(s) were already imported.\n`{e}`",
+                        color=0xE02B2B,
+                    )
+                    await context.send(embed=embed, ephemeral=True)
+                    return
+        description = f"Successfully imported {imported} link(s)."
+        if skipped:
+            lines = ", ".join(str(line) for line in skipped[:20])
+            description += f"\nSkipped {len(skipped)} invalid row(s) on line(s) {lines}{'...' if len(skipped) > 20 else ''}."
+        embed = Embed(description=description, color=0xBEBEFE)
+        await context.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(
+        name="export_links",
+        description="Exports every BBB ID link as a file.",
+    )
+    @app_commands.describe(file_format="The format of the file.")
+    @app_commands.choices(
+        file_format=[
+            app_commands.Choice(name="CSV", value="csv"),
+            app_commands.Choice(name="JSON lines", value="jsonl"),
+        ],
+    )
+    @app_commands.default_permissions(administrator=True)
+    @commands.is_owner()
+    async def export_links(self, context: Context, file_format: str = "csv") -> None:
+        """
+        The bot will send every BBB ID link as a file.
+
+        :param context: The hybrid command context.
+        :param file_format: The format of the file, `csv` or `jsonl`.
+        """
+        if file_format not in ("csv", "jsonl"):
+            embed = Embed(
+                description="The format must be `csv` or `jsonl`.", color=0xE02B2B
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+        await context.defer(ephemeral=True)
+        with TemporaryFile() as temporary_file:
+            with TextIOWrapper(temporary_file, encoding="utf-8", newline="") as text:
+                exported = 0
+                writer = csv_writer(text)
+                if file_format == "csv":
+                    writer.writerow(("user_id", "bbb_id", "bbb_name"))
+                async for (
+                    user_id,
+                    bbb_id,
+                    bbb_name,
+                ) in self.bot.database.export_links():  # noqa
+                    if file_format == "csv":
+                        writer.writerow((user_id, bbb_id, bbb_name))
+                    else:
+                        text.write(
+                            dumps(
+                                {
+                                    "user_id": user_id,
+                                    "bbb_id": bbb_id,
+                                    "bbb_name": bbb_name,
+                                }
+                            )
+                            + "\n"
+                        )
+                    exported += 1
+                text.flush()
+                temporary_file.seek(0)
+                await context.send(
+                    content=f"Exported {exported} link(s).",
+                    file=File(temporary_file, filename=f"bbb_links.{file_format}"),
+                    ephemeral=True,
+                )
+
+    @commands.hybrid_command(
+        name="stats",
+        description="Shows the latency and throughput of the commands.",
+    )
+    @app_commands.default_permissions(administrator=True)
+    @commands.is_owner()
+    async def stats(self, context: Context) -> None:
+        """
+        The bot will show the invocation counts, error rates and latency percentiles of its commands.
+
+        :param context: The hybrid command context.
+        """
+        pool = self.bot.database.pool_stats()  # noqa
+        cache = self.bot.database.cache_stats()  # noqa
+        description = (
+            f"**Read pool**: {pool['idle']}/{pool['size']} idle, {pool['waits']}/{pool['acquisitions']} waited ({pool['wait_time'] * 1000:.0f} ms)\n"
+            f"**Link cache**: {cache['size']}/{cache['max_size']} entries, {cache['hit_rate']:.1%} hit rate"
+        )
+        cog = self.bot.get_cog("mysingingmonsters")
+        if cog is not None and cog.autocomplete_choices is not None:  # noqa
+            info = cog.autocomplete_choices.cache_info()  # noqa
+            lookups = info.hits + info.misses
+            description += f"\n**Autocomplete cache**: {info.currsize}/{info.maxsize} entries, {info.hits / lookups if lookups else 0.0:.1%} hit rate"
+
+        lines = []
+        for name, stats in self.bot.metrics.summary():  # noqa
+            total = stats.phases["total"]
+            database = stats.phases.get("database")
+            line = (
+                f"**{name}**: {stats.count} call(s), {stats.errors / stats.count:.1%} errors\n"
+                f"p50 {total.percentile(0.5) * 1000:.1f} ms, p95 {total.percentile(0.95) * 1000:.1f} ms, p99 {total.percentile(0.99) * 1000:.1f} ms"
+            )
+            if database is not None:
+                line += f", database p50 {database.percentile(0.5) * 1000:.1f} ms"
+            lines.append(line)
+        if not lines:
+            lines.append("No commands have been used yet.")
+        pages = [
+            Embed(
+                title="Stats",
+                description=description
+                + "\n\n"
+                + "\n".join(lines[start : start + STATS_PER_PAGE]),
+                color=0xBEBEFE,
+            )
+            for start in range(0, len(lines), STATS_PER_PAGE)
+        ]
+        await send_pages(context, pages)
+
+    @commands.hybrid_command(
+        name="profile",
+        description="Profiles the commands of the bot.",
+    )
+    @app_commands.describe(
+        action="What to do with the profiler.",
+        command_names="The commands to profile, separated by commas. Defaults to all commands.",
+        sample_rate="The fraction of the invocations to profile.",
+    )
+    @app_commands.choices(
+        action=[
+            app_commands.Choice(name="Start", value="start"),
+            app_commands.Choice(name="Stop", value="stop"),
+            app_commands.Choice(name="Dump", value="dump"),
+            app_commands.Choice(name="Reset", value="reset"),
+        ],
+    )
+    @app_commands.default_permissions(administrator=True)
+    @commands.is_owner()
+    async def profile(
+        self,
+        context: Context,
+        action: str,
+        command_names: Optional[str] = None,
+        sample_rate: commands.Range[float, 0.0, 1.0] = 1.0,
+    ) -> None:
+        """
+        The bot will start or stop profiling its commands, or send the aggregated profile.
+
+        :param context: The hybrid command context.
+        :param action: `start`, `stop`, `dump` or `reset`.
+        :param command_names: The commands to profile, separated by commas.
+        :param sample_rate: The fraction of the invocations to profile.
+        """
+        profiler = self.bot.profiler  # noqa
+        if action == "start":
+            names = None
+            if command_names:
+                names = [name.strip() for name in command_names.split(",")]
+                unknown = [
+                    name
+                    for name in names
+                    if name and self.bot.get_command(name) is None
+                ]
+                if unknown:
+                    embed = Embed(
+                        description="Unknown command(s): "
+                        + ", ".join(f"`{name}`" for name in unknown),
+                        color=0xE02B2B,
+                    )
+                    await context.send(embed=embed, ephemeral=True)
+                    return
+                names = [
+                    self.bot.get_command(name).qualified_name for name in names if name
+                ]
+            profiler.enable(names, sample_rate)
+            embed = Embed(
+                description=f"Profiling {', '.join(f'`{name}`' for name in names) if names else 'all commands'} at a sample rate of {sample_rate:.0%}.",
+                color=0xBEBEFE,
+            )
+            await context.send(embed=embed, ephemeral=True)
+        elif action == "stop":
+            profiler.disable()
+            embed = Embed(
+                description=f"Stopped profiling after {profiler.profiled} invocation(s).",
+                color=0xBEBEFE,
+            )
+            await context.send(embed=embed, ephemeral=True)
+        elif action == "dump":
+            if profiler.stats is None:
+                embed = Embed(
+                    description="No invocations have been profiled yet.",
+                    color=0xE02B2B,
+                )
+                await context.send(embed=embed, ephemeral=True)
+                return
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            directory = self.bot.config.get("profiling", {}).get("directory")  # noqa
+            if directory:
+                makedirs(directory, exist_ok=True)
+                profiler.dump(f"{directory}/profile-{timestamp}.prof")
+            with TemporaryDirectory() as temporary_directory:
+                profiler.dump(f"{temporary_directory}/profile.prof")
+                with open(f"{temporary_directory}/profile.prof", "rb") as file:
+                    raw = file.read()
+            await context.send(
+                content=f"Profile of {profiler.profiled} invocation(s).",
+                files=[
+                    File(
+                        BytesIO(profiler.report().encode()),
+                        filename=f"profile-{timestamp}.txt",
+                    ),
+                    File(BytesIO(raw), filename=f"profile-{timestamp}.prof"),
+                ],
+                ephemeral=True,
+            )
+        elif action == "reset":
+            profiler.reset()
+            embed = Embed(description="The profile has been reset.", color=0xBEBEFE)
+            await context.send(embed=embed, ephemeral=True)
+        else:
+            embed = Embed(
+                description="The action must be `start`, `stop`, `dump` or `reset`.",
+                color=0xE02B2B,
+            )
+            await context.send(embed=embed, ephemeral=True)
+
     @commands.hybrid_command(
         name="shutdown",
         description="Make the bot shutdown.",
@@ -286,10 +602,7 @@ class Owner(commands.Cog, name="owner"):
         """
         embed = Embed(description="Shutting down. Bye! :wave:", color=0xBEBEFE)
         await context.send(embed=embed, ephemeral=True)
-        try:
-            await self.bot.close()  # Doesn't always close the program!
-        finally:
-            exit(0)
+        await self.bot.close()
 
 
 async def setup(bot) -> None:
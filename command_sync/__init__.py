@@ -0,0 +1,139 @@
+from asyncio import Semaphore, gather
+from hashlib import sha256
+from json import dumps
+from logging import Logger
+from typing import Iterable, List, Optional, Tuple
+
+from discord import Guild
+from discord.app_commands import CommandTree
+
+from database import DatabaseManager
+
+GLOBAL_SCOPE = 0
+
+
+class CommandSyncer:
+    def __init__(
+        self,
+        tree: CommandTree,
+        database: DatabaseManager,
+        concurrency: int = 4,
+        logger: Optional[Logger] = None,
+    ) -> None:
+        """
+        Synchronizes the slash commands only where they changed since the last synchronization.
+
+        The payload of every command tree is hashed and compared to the hash that
+        was stored in the database when it was last synchronized, so an unchanged
+        tree does not cost any requests.
+
+        :param tree: The command tree of the bot.
+        :param database: The database the hashes are stored in.
+        :param concurrency: The maximum number of trees that are synchronized at once.
+        :param logger: The logger to report failed synchronizations to, if any.
+        """
+        self.tree = tree
+        self.database = database
+        self.logger = logger
+        self._semaphore = Semaphore(max(1, concurrency))
+
+    async def tree_hash(self, guild: Optional[Guild] = None) -> str:
+        """
+        Hashes the payload that synchronizing a command tree would send.
+
+        :param guild: The guild of the command tree, or `None` for the global commands.
+        :return: The hex digest of the payload.
+        """
+        translator = self.tree.translator
+        payload = []
+        for command in self.tree.get_commands(guild=guild):
+            if translator:
+                payload.append(
+                    await command.get_translated_payload(self.tree, translator)
+                )
+            else:
+                payload.append(command.to_dict(self.tree))
+        payload.sort(key=lambda data: (data.get("type", 1), data["name"]))
+        return sha256(
+            dumps(
+                [self.tree.client.application_id, payload],
+                sort_keys=True,
+                separators=(",", ":"),
+                default=str,
+            ).encode()
+        ).hexdigest()
+
+    async def pending(
+        self, guilds: Iterable[Guild]
+    ) -> List[Tuple[Optional[Guild], str]]:
+        """
+        Finds the command trees that changed since they were last synchronized.
+
+        :param guilds: The guilds whose command trees should be checked, besides the global one.
+        :return: The changed trees, as `(guild, hash)` tuples with `None` for the global commands.
+        """
+        hashes = await self.database.get_command_hashes()
+        pending = []
+        for guild in [None, *guilds]:
+            tree_hash = await self.tree_hash(guild)
+            if hashes.get(guild.id if guild else GLOBAL_SCOPE) != tree_hash:
+                pending.append((guild, tree_hash))
+        return pending
+
+    async def sync(self, guild: Optional[Guild] = None, force: bool = False) -> bool:
+        """
+        Synchronizes a single command tree if it changed.
+
+        :param guild: The guild of the command tree, or `None` for the global commands.
+        :param force: Whether to synchronize the tree even if it did not change.
+        :return: Whether the tree was synchronized.
+        """
+        tree_hash = await self.tree_hash(guild)
+        if not force:
+            hashes = await self.database.get_command_hashes()
+            if hashes.get(guild.id if guild else GLOBAL_SCOPE) == tree_hash:
+                return False
+        await self._sync(guild, tree_hash)
+        return True
+
+    async def sync_pending(self, pending: List[Tuple[Optional[Guild], str]]) -> int:
+        """
+        Synchronizes the command trees found by `pending`, a few at a time.
+
+        A tree that fails to synchronize is logged and retried next time.
+
+        :param pending: The changed trees, as returned by `pending`.
+        :return: The number of trees that were synchronized.
+        """
+        results = await gather(
+            *(self._sync(guild, tree_hash) for guild, tree_hash in pending),
+            return_exceptions=True,
+        )
+        synced = 0
+        for (guild, _), result in zip(pending, results):
+            if isinstance(result, Exception):
+                if self.logger is not None:
+                    scope = (
+                        f"guild {guild.name} (ID: {guild.id})" if guild else "global"
+                    )
+                    self.logger.error(
+                        f"Failed to sync the {scope} slash commands\n{type(result).__name__}: {result}"
+                    )
+            else:
+                synced += 1
+        return synced
+
+    async def forget(self, guild: Optional[Guild] = None) -> None:
+        """
+        Forgets the last synchronization of a command tree, so it is synchronized again next time.
+
+        :param guild: The guild of the command tree, or `None` for the global commands.
+        """
+        await self.database.remove_command_hash(guild.id if guild else GLOBAL_SCOPE)
+
+    async def _sync(self, guild: Optional[Guild], tree_hash: str) -> None:
+        async with self._semaphore:
+            await self.tree.sync(guild=guild)
+        await self.database.set_command_hash(
+            guild.id if guild else GLOBAL_SCOPE, tree_hash
+        )
@@ -1,11 +1,513 @@
-from typing import Optional
+from asyncio import (
+    Event,
+    Future,
+    Lock,
+    Queue,
+    Task,
+    TimeoutError,
+    create_task,
+    get_running_loop,
+    wait_for,
+)
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from csv import Error as CsvError, reader as csv_reader
+from json import loads
+from os import listdir
+from os.path import abspath
+from sqlite3 import Error
+from time import monotonic, perf_counter
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+from urllib.request import pathname2url
 
-from aiosqlite import Connection
+from aiosqlite import Connection, connect
+
+from metrics import add_phase_time
+
+MAX_USER_ID = 2**63 - 1
+"""The largest user ID that fits in the INTEGER primary key of the `bbb` table."""
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 268435456,
+    "cache_size": -16000,
+    "temp_store": "memory",
+    "cached_statements": 256,
+    "batch_window": 0.005,
+    "batch_size": 100,
+    "read_pool_size": 4,
+    "link_cache_size": 10000,
+    "link_cache_ttl": 300,
+    "maintenance_interval": 3600,
+}
+
+PRAGMA_CHOICES = {
+    "journal_mode": {"delete", "truncate", "persist", "memory", "wal", "off"},
+    "synchronous": {"off", "normal", "full", "extra"},
+    "temp_store": {"default", "file", "memory"},
+}
+
+INTEGER_MINIMUMS = {
+    "mmap_size": 0,
+    "cache_size": None,
+    "cached_statements": 0,
+    "batch_size": 1,
+    "read_pool_size": 0,
+    "link_cache_size": 0,
+    "maintenance_interval": 0,
+}
+NUMBER_MINIMUMS = {
+    "batch_window": 0,
+    "link_cache_ttl": 0,
+}
+
+
+class LinkImportError(Exception):
+    def __init__(self, imported: int, error: Exception) -> None:
+        """
+        Raised when a bulk import fails after some of its chunks were already committed.
+
+        :param imported: The number of links that were committed before the failure.
+        :param error: The error that stopped the import.
+        """
+        super().__init__(f"{type(error).__name__}: {error}")
+        self.imported = imported
+        self.error = error
+
+
+def load_profile(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    This function will merge the `database` section of the config with the default profile.
+
+    :param config: The bot config.
+    :return: The connection profile.
+    """
+    profile = {**DEFAULT_PROFILE, **config.get("database", {})}
+    for pragma, choices in PRAGMA_CHOICES.items():
+        profile[pragma] = str(profile[pragma]).lower()
+        if profile[pragma] not in choices:
+            raise ValueError(
+                f"Invalid database {pragma} '{profile[pragma]}', expected one of {', '.join(sorted(choices))}"
+            )
+    for setting, minimum in INTEGER_MINIMUMS.items():
+        value = profile[setting]
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, int)
+            or (minimum is not None and value < minimum)
+        ):
+            raise ValueError(
+                f"Invalid database {setting} '{value}', expected an integer"
+                + (f" of at least {minimum}" if minimum is not None else "")
+            )
+    for setting, minimum in NUMBER_MINIMUMS.items():
+        value = profile[setting]
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or value < minimum
+        ):
+            raise ValueError(
+                f"Invalid database {setting} '{value}', expected a number of at least {minimum}"
+            )
+    return profile
+
+
+def parse_links(
+    file: TextIO, file_format: str, skipped: List[int]
+) -> Iterator[Tuple[int, str, str]]:
+    """
+    This function will stream the links out of a CSV or JSON lines file.
+
+    CSV rows are `user_id,bbb_id,bbb_name`, optionally below a header row. JSON
+    lines are objects with the `user_id`, `bbb_id` and `bbb_name` keys. Rows that
+    cannot be decoded or parsed are skipped, so the file should be opened with
+    `errors="surrogateescape"` to keep invalid bytes from ending the stream.
+
+    :param file: The file to read.
+    :param file_format: Either `csv` or `jsonl`.
+    :param skipped: The list the line numbers of invalid rows are added to.
+    :return: The links, as `(user_id, bbb_id, bbb_name)` tuples.
+    """
+    if file_format == "csv":
+        rows = csv_reader(file)
+    elif file_format == "jsonl":
+        rows = iter(file)
+    else:
+        raise ValueError(f"Unsupported file format '{file_format}'")
+    line_number = 0
+    while True:
+        line_number += 1
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except CsvError:
+            skipped.append(line_number)
+            continue
+        if not (row if file_format == "csv" else row.strip()):
+            continue
+        try:
+            if file_format == "jsonl":
+                row = loads(row)
+                row = (row["user_id"], row["bbb_id"], row["bbb_name"])
+            user_id, bbb_id, bbb_name = row
+            user_id = int(user_id)
+            bbb_id = str(bbb_id).strip()
+            bbb_name = str(bbb_name).strip()
+            # Undecodable bytes survive as lone surrogates, which cannot be encoded.
+            bbb_id.encode()
+            bbb_name.encode()
+        except (ValueError, TypeError, KeyError):
+            if not (file_format == "csv" and line_number == 1):
+                skipped.append(line_number)
+            continue
+        if not bbb_id or not bbb_name or not 1 <= user_id <= MAX_USER_ID:
+            skipped.append(line_number)
+            continue
+        yield user_id, bbb_id, bbb_name
+
+
+async def configure_connection(
+    connection: Connection, profile: Dict[str, Any], read_only: bool = False
+) -> None:
+    """
+    This function will apply the pragmas of a connection profile to a connection.
+
+    :param connection: The connection that should be configured.
+    :param profile: The connection profile, as returned by `load_profile`.
+    :param read_only: Whether the connection is read-only, which skips the pragmas that only matter to writers.
+    """
+    if not read_only:
+        await connection.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+        await connection.execute(f"PRAGMA synchronous={profile['synchronous']}")
+    await connection.execute(f"PRAGMA mmap_size={profile['mmap_size']}")
+    await connection.execute(f"PRAGMA cache_size={profile['cache_size']}")
+    await connection.execute(f"PRAGMA temp_store={profile['temp_store']}")
+
+
+async def apply_migrations(
+    connection: Connection, directory: str, target_version: Optional[int] = None
+) -> int:
+    """
+    This function will apply every migration that the database has not seen yet.
+
+    Migrations are `.sql` files named after their version, like `0001_name.sql`,
+    and the current version is tracked with the `user_version` pragma. Each
+    migration runs in its own transaction.
+
+    :param connection: The connection to the database that should be migrated.
+    :param directory: The directory that contains the migration files.
+    :param target_version: The version to stop at, or `None` to apply every migration.
+    :return: The version of the database after migrating.
+    """
+    async with connection.execute("PRAGMA user_version") as cursor:
+        (current_version,) = await cursor.fetchone()
+    for migration_file in sorted(listdir(directory)):
+        if not migration_file.endswith(".sql"):
+            continue
+        version = int(migration_file.split("_", 1)[0])
+        if version <= current_version:
+            continue
+        if target_version is not None and version > target_version:
+            break
+        with open(f"{directory}/{migration_file}") as file:
+            migration = file.read()
+        try:
+            await connection.executescript(
+                f"BEGIN;\n{migration}\nPRAGMA user_version = {version};\nCOMMIT;"
+            )
+        except Exception:
+            await connection.rollback()
+            raise
+        current_version = version
+    return current_version
 
 
 class DatabaseManager:
-    def __init__(self, *, connection: Connection) -> None:
+    def __init__(
+        self,
+        *,
+        connection: Connection,
+        readers: Optional[List[Connection]] = None,
+        batch_window: float = 0.005,
+        batch_size: int = 100,
+        link_cache_size: int = 10000,
+        link_cache_ttl: float = 300.0,
+    ) -> None:
+        """
+        :param connection: The connection to the database, used for all writes.
+        :param readers: The read-only connections that reads are spread over, if any.
+        :param batch_window: How many seconds writes are collected before they are committed together.
+        :param batch_size: How many writes make a batch commit right away.
+        :param link_cache_size: How many BBB ID lookups are cached, 0 disables the cache.
+        :param link_cache_ttl: How many seconds a cached BBB ID lookup stays valid.
+        """
         self.connection = connection
+        self.readers = readers or []
+        self._idle_readers: Queue = Queue()
+        for reader in self.readers:
+            self._idle_readers.put_nowait(reader)
+        self.reader_acquisitions = 0
+        self.reader_waits = 0
+        self.reader_wait_time = 0.0
+        self.link_cache_size = link_cache_size
+        self.link_cache_ttl = link_cache_ttl
+        self._link_cache: OrderedDict[int, Tuple[float, Optional[tuple]]] = (
+            OrderedDict()
+        )
+        self._link_cache_version = 0
+        self.link_cache_hits = 0
+        self.link_cache_misses = 0
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.write_lock = Lock()
+        self._pending_writes: List[Tuple[str, tuple, Future]] = []
+        self._batch_full = Event()
+        self._flush_task: Optional[Task] = None
+        self.closed = False
+
+    @classmethod
+    async def open(cls, path: str, profile: Dict[str, Any]) -> "DatabaseManager":
+        """
+        This function will open the writer connection and the pool of read-only connections of a database.
+
+        :param path: The path of the database file.
+        :param profile: The connection profile, as returned by `load_profile`.
+        :return: The database manager.
+        """
+        connection = await connect(path, cached_statements=profile["cached_statements"])
+        readers = []
+        try:
+            await configure_connection(connection, profile)
+            for _ in range(profile["read_pool_size"]):
+                reader = await connect(
+                    f"file:{pathname2url(abspath(path))}?mode=ro",
+                    uri=True,
+                    cached_statements=profile["cached_statements"],
+                )
+                readers.append(reader)
+                await configure_connection(reader, profile, read_only=True)
+        except Exception:
+            for reader in readers:
+                await reader.close()
+            await connection.close()
+            raise
+        return cls(
+            connection=connection,
+            readers=readers,
+            batch_window=profile["batch_window"],
+            batch_size=profile["batch_size"],
+            link_cache_size=profile["link_cache_size"],
+            link_cache_ttl=profile["link_cache_ttl"],
+        )
+
+    async def init_schema(
+        self,
+        schema_path: str,
+        migrations_directory: str,
+        target_version: Optional[int] = None,
+    ) -> int:
+        """
+        This function will create the base schema and apply the pending migrations on the writer connection.
+
+        :param schema_path: The path of the base schema file.
+        :param migrations_directory: The directory that contains the migration files.
+        :param target_version: The version to stop at, or `None` to apply every migration.
+        :return: The version of the database after migrating.
+        """
+        async with self.write_lock:
+            with open(schema_path) as file:
+                await self.connection.executescript(file.read())
+            await self.connection.commit()
+            return await apply_migrations(
+                self.connection, migrations_directory, target_version
+            )
+
+    async def close(self) -> None:
+        """
+        This function will commit the pending writes, checkpoint the write-ahead log and close every connection.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        while self._flush_task is not None and not self._flush_task.done():
+            self._batch_full.set()
+            await self._flush_task
+        async with self.write_lock:
+            await self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            for reader in self.readers:
+                await reader.close()
+            await self.connection.close()
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[Connection]:
+        """
+        This function will lend out an idle read-only connection, waiting for one if they are all busy.
+
+        Without a read pool the writer connection is used instead.
+        """
+        started = perf_counter()
+        if not self.readers:
+            try:
+                yield self.connection
+            finally:
+                add_phase_time("database", perf_counter() - started)
+            return
+        self.reader_acquisitions += 1
+        if self._idle_readers.empty():
+            self.reader_waits += 1
+            reader = await self._idle_readers.get()
+            self.reader_wait_time += perf_counter() - started
+        else:
+            reader = self._idle_readers.get_nowait()
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put_nowait(reader)
+            add_phase_time("database", perf_counter() - started)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        This function will report how busy the read pool is.
+        """
+        return {
+            "size": len(self.readers),
+            "idle": self._idle_readers.qsize(),
+            "acquisitions": self.reader_acquisitions,
+            "waits": self.reader_waits,
+            "wait_time": self.reader_wait_time,
+        }
+
+    def invalidate_link(self, user_id: Optional[int] = None) -> None:
+        """
+        This function will drop a cached BBB ID lookup, or all of them.
+
+        :param user_id: The ID of the user whose lookup should be dropped, or `None` for all users.
+        """
+        self._link_cache_version += 1
+        if user_id is None:
+            self._link_cache.clear()
+        else:
+            self._link_cache.pop(user_id, None)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        This function will report how effective the BBB ID lookup cache is.
+        """
+        lookups = self.link_cache_hits + self.link_cache_misses
+        return {
+            "size": len(self._link_cache),
+            "max_size": self.link_cache_size,
+            "hits": self.link_cache_hits,
+            "misses": self.link_cache_misses,
+            "hit_rate": self.link_cache_hits / lookups if lookups else 0.0,
+        }
+
+    async def _write(self, query: str, parameters: tuple) -> int:
+        """
+        This function will queue a write and wait for the batch it ends up in to be committed.
+
+        :param query: The statement that should be executed.
+        :param parameters: The parameters of the statement.
+        :return: The number of rows changed by the statement.
+        """
+        if self.closed:
+            raise RuntimeError("The database is closed")
+        future = get_running_loop().create_future()
+        self._pending_writes.append((query, parameters, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = create_task(self._flush_writes())
+        elif len(self._pending_writes) >= self.batch_size:
+            self._batch_full.set()
+        started = perf_counter()
+        try:
+            return await future
+        finally:
+            add_phase_time("database", perf_counter() - started)
+
+    async def _flush_writes(self) -> None:
+        """
+        This function will commit the queued writes in batches until the queue is empty.
+        """
+        while self._pending_writes:
+            if len(self._pending_writes) < self.batch_size:
+                try:
+                    await wait_for(self._batch_full.wait(), self.batch_window)
+                except TimeoutError:
+                    pass
+            self._batch_full.clear()
+            batch = self._pending_writes[: self.batch_size]
+            del self._pending_writes[: self.batch_size]
+            results = []
+            async with self.write_lock:
+                try:
+                    for query, parameters, _ in batch:
+                        try:
+                            cursor = await self.connection.execute(query, parameters)
+                            results.append(cursor.rowcount)
+                        except Error as e:
+                            results.append(e)
+                    await self.connection.commit()
+                except Exception as e:
+                    await self.connection.rollback()
+                    results = [e] * len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def run_maintenance(self) -> None:
+        """
+        This function will checkpoint the write-ahead log and let SQLite refresh its query planner statistics.
+        """
+        async with self.write_lock:
+            await self.connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            await self.connection.execute("PRAGMA optimize")
+
+    async def get_command_hashes(self) -> Dict[int, str]:
+        """
+        This function will retrieve the hashes of the last synchronized command trees.
+
+        :return: The hashes, by guild ID, with `0` for the global commands.
+        """
+        async with self.reader() as reader:
+            async with reader.execute("SELECT scope, hash FROM command_sync") as cursor:
+                return {scope: hash for scope, hash in await cursor.fetchall()}
+
+    async def set_command_hash(self, scope: int, hash: str) -> None:
+        """
+        This function will record the hash of a command tree that has just been synchronized.
+
+        :param scope: The ID of the guild, or `0` for the global commands.
+        :param hash: The hash of the synchronized command tree.
+        """
+        await self._write(
+            "INSERT INTO command_sync(scope, hash) VALUES (?, ?) ON CONFLICT(scope) DO UPDATE SET hash=excluded.hash",
+            (scope, hash),
+        )
+
+    async def remove_command_hash(self, scope: int) -> None:
+        """
+        This function will forget the hash of a command tree, so it is synchronized again next time.
+
+        :param scope: The ID of the guild, or `0` for the global commands.
+        """
+        await self._write("DELETE FROM command_sync WHERE scope=?", (scope,))
 
     async def set_bbb_id(self, user_id: int, bbb_id: str, bbb_name: str) -> bool:
         """
@@ -15,16 +517,15 @@ class DatabaseManager:
         :param bbb_id: The BBB ID of the user that should be linked.
         :param bbb_name: The BBB name the user that should be linked.
         """
-        await self.connection.execute(
-            "INSERT INTO bbb(user_id, bbb_id, bbb_name) VALUES (?, ?, ?)",
-            (user_id, bbb_id, bbb_name),
-        )
-        await self.connection.commit()
-        async with self.connection.execute(
-            "SELECT COUNT(*) FROM bbb WHERE user_id=?", (user_id,)
-        ) as cursor:
-            result = await cursor.fetchone()
-            return result[0] > 0 if result is not None else False
+        self.invalidate_link(user_id)
+        try:
+            changes = await self._write(
+                "INSERT INTO bbb(user_id, bbb_id, bbb_name) VALUES (?, ?, ?) ON CONFLICT(user_id) DO NOTHING",
+                (user_id, bbb_id, bbb_name),
+            )
+        finally:
+            self.invalidate_link(user_id)
+        return changes > 0
 
     async def remove_bbb_id(self, user_id: int) -> bool:
         """
@@ -32,13 +533,12 @@ class DatabaseManager:
 
         :param user_id: The ID of the user that should be unlinked.
         """
-        await self.connection.execute("DELETE FROM bbb WHERE user_id=?", (user_id,))
-        await self.connection.commit()
-        async with self.connection.execute(
-            "SELECT COUNT(*) FROM bbb WHERE user_id=?", (user_id,)
-        ) as cursor:
-            result = await cursor.fetchone()
-            return result[0] == 0 if result is not None else False
+        self.invalidate_link(user_id)
+        try:
+            changes = await self._write("DELETE FROM bbb WHERE user_id=?", (user_id,))
+        finally:
+            self.invalidate_link(user_id)
+        return changes > 0
 
     async def get_bbb_id(self, user_id: int) -> Optional[tuple[str]]:
         """
@@ -47,8 +547,141 @@ class DatabaseManager:
         :param user_id: The ID of the user whose BBB ID should be retrieved.
         :return: The BBB ID of the user.
         """
-        async with self.connection.execute(
-            "SELECT bbb_id, bbb_name FROM bbb WHERE user_id=?", (user_id,)
-        ) as cursor:
-            result = await cursor.fetchone()
-            return (result[0], result[1]) if result is not None else None
+        cached = self._link_cache.get(user_id)
+        if cached is not None and cached[0] > monotonic():
+            self._link_cache.move_to_end(user_id)
+            self.link_cache_hits += 1
+            return cached[1]
+        self.link_cache_misses += 1
+        version = self._link_cache_version
+        async with self.reader() as reader:
+            async with reader.execute(
+                "SELECT bbb_id, bbb_name FROM bbb WHERE user_id=?", (user_id,)
+            ) as cursor:
+                result = await cursor.fetchone()
+        result = (result[0], result[1]) if result is not None else None
+        if self.link_cache_size > 0 and version == self._link_cache_version:
+            self._link_cache[user_id] = (monotonic() + self.link_cache_ttl, result)
+            self._link_cache.move_to_end(user_id)
+            if len(self._link_cache) > self.link_cache_size:
+                self._link_cache.popitem(last=False)
+        return result
+
+    async def search_links(
+        self, query: str, limit: int = 100
+    ) -> List[Tuple[int, str, str]]:
+        """
+        This function will search the links by BBB ID and BBB name.
+
+        Every query matches anywhere in the ID or name, ignoring case. Queries
+        of three or more characters use the trigram index, shorter ones, which
+        the index cannot look up, scan the table instead.
+
+        :param query: The text to search for.
+        :param limit: The maximum number of links to return.
+        :return: The matching links, as `(user_id, bbb_id, bbb_name)` tuples, best matches first.
+        :raises ValueError: If the query is empty.
+        """
+        query = query.strip()
+        if not query:
+            raise ValueError("The search query is empty")
+        if len(query) >= 3:
+            statement = "SELECT rowid, bbb_id, bbb_name FROM bbb_search WHERE bbb_search MATCH ? ORDER BY rank LIMIT ?"
+            parameters = ('"' + query.replace('"', '""') + '"', limit)
+        else:
+            statement = "SELECT user_id, bbb_id, bbb_name FROM bbb WHERE bbb_id LIKE ? ESCAPE '\\' OR bbb_name LIKE ? ESCAPE '\\' ORDER BY bbb_id LIMIT ?"
+            pattern = (
+                "%"
+                + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                + "%"
+            )
+            parameters = (pattern, pattern, limit)
+        async with self.reader() as reader:
+            async with reader.execute(statement, parameters) as cursor:
+                return [tuple(row) for row in await cursor.fetchall()]
+
+    async def get_links_for_users(
+        self, user_ids: Iterable[int], batch_size: int = 900
+    ) -> AsyncIterator[Tuple[int, str, str]]:
+        """
+        This function will stream the links of the given users, looking them up a batch of users at a time.
+
+        :param user_ids: The IDs of the users whose links should be retrieved.
+        :param batch_size: How many users are looked up per query.
+        :return: The links, as `(user_id, bbb_id, bbb_name)` tuples.
+        """
+        batch = []
+        for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                for link in await self._get_links_batch(batch):
+                    yield link
+                batch = []
+        if batch:
+            for link in await self._get_links_batch(batch):
+                yield link
+
+    async def _get_links_batch(self, user_ids: List[int]) -> List[Tuple[int, str, str]]:
+        async with self.reader() as reader:
+            async with reader.execute(
+                f"SELECT user_id, bbb_id, bbb_name FROM bbb WHERE user_id IN ({', '.join('?' * len(user_ids))})",
+                user_ids,
+            ) as cursor:
+                return [tuple(row) for row in await cursor.fetchall()]
+
+    async def import_links(
+        self, links: Iterable[Tuple[int, str, str]], chunk_size: int = 5000
+    ) -> int:
+        """
+        This function will insert or update many links, committing them in chunks.
+
+        :param links: The links, as `(user_id, bbb_id, bbb_name)` tuples.
+        :param chunk_size: How many links are committed per transaction.
+        :return: The number of links that were imported.
+        :raises LinkImportError: If the import failed, with the number of links committed before.
+        """
+        imported = 0
+        chunk = []
+        async with self.write_lock:
+            try:
+                for link in links:
+                    chunk.append(link)
+                    if len(chunk) >= chunk_size:
+                        imported += await self._import_chunk(chunk)
+                        chunk = []
+                if chunk:
+                    imported += await self._import_chunk(chunk)
+            except Exception as e:
+                raise LinkImportError(imported, e) from e
+            finally:
+                self.invalidate_link()
+        return imported
+
+    async def _import_chunk(self, chunk: List[Tuple[int, str, str]]) -> int:
+        try:
+            cursor = await self.connection.executemany(
+                "INSERT INTO bbb(user_id, bbb_id, bbb_name) VALUES (?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET bbb_id=excluded.bbb_id, bbb_name=excluded.bbb_name",
+                chunk,
+            )
+            await self.connection.commit()
+        except Exception:
+            await self.connection.rollback()
+            raise
+        return cursor.rowcount
+
+    async def export_links(
+        self, chunk_size: int = 1000
+    ) -> AsyncIterator[Tuple[int, str, str]]:
+        """
+        This function will stream every link out of the database, a chunk of rows at a time.
+
+        :param chunk_size: How many rows are fetched at once.
+        :return: The links, as `(user_id, bbb_id, bbb_name)` tuples.
+        """
+        async with self.reader() as reader:
+            async with reader.execute(
+                "SELECT user_id, bbb_id, bbb_name FROM bbb ORDER BY user_id"
+            ) as cursor:
+                while rows := await cursor.fetchmany(chunk_size):
+                    for row in rows:
+                        yield row
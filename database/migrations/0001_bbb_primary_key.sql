@@ -0,0 +1,13 @@
+create table `bbb_new` (
+  `user_id` integer primary key,
+  `bbb_id` text not null,
+  `bbb_name` text not null
+);
+
+insert or ignore into `bbb_new` (`user_id`, `bbb_id`, `bbb_name`)
+  select cast(`user_id` as integer), `bbb_id`, `bbb_name` from `bbb` order by `rowid`;
+
+drop table `bbb`;
+alter table `bbb_new` rename to `bbb`;
+
+create index `bbb_bbb_id` on `bbb` (`bbb_id`);
@@ -0,0 +1,26 @@
+create virtual table `bbb_search` using fts5(
+  bbb_id,
+  bbb_name,
+  content = 'bbb',
+  content_rowid = 'user_id',
+  tokenize = 'trigram'
+);
+
+insert into `bbb_search` (`bbb_search`) values ('rebuild');
+
+create trigger `bbb_search_insert` after insert on `bbb` begin
+  insert into `bbb_search` (`rowid`, `bbb_id`, `bbb_name`)
+    values (new.`user_id`, new.`bbb_id`, new.`bbb_name`);
+end;
+
+create trigger `bbb_search_delete` after delete on `bbb` begin
+  insert into `bbb_search` (`bbb_search`, `rowid`, `bbb_id`, `bbb_name`)
+    values ('delete', old.`user_id`, old.`bbb_id`, old.`bbb_name`);
+end;
+
+create trigger `bbb_search_update` after update on `bbb` begin
+  insert into `bbb_search` (`bbb_search`, `rowid`, `bbb_id`, `bbb_name`)
+    values ('delete', old.`user_id`, old.`bbb_id`, old.`bbb_name`);
+  insert into `bbb_search` (`rowid`, `bbb_id`, `bbb_name`)
+    values (new.`user_id`, new.`bbb_id`, new.`bbb_name`);
+end;
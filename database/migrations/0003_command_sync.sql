@@ -0,0 +1,4 @@
+create table `command_sync` (
+  `scope` integer primary key,
+  `hash` char(64) not null
+);
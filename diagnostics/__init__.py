@@ -0,0 +1,176 @@
+from asyncio import AbstractEventLoop, CancelledError, sleep
+from cProfile import Profile
+from io import StringIO
+from logging import Logger
+from pstats import Stats
+from random import random
+from sys import _current_frames  # noqa
+from threading import Event, Thread, get_ident
+from time import monotonic
+from traceback import format_stack
+from typing import Iterable, Optional, Set
+
+
+class CommandProfiler:
+    def __init__(self) -> None:
+        """
+        Profiles selected command invocations and aggregates their stats.
+
+        Python can only run one profiler per thread, so while an invocation is
+        profiled the others are not sampled. The profile also includes whatever
+        else the event loop runs while the command is waiting.
+        """
+        self.enabled = False
+        self.commands: Optional[Set[str]] = None
+        self.sample_rate = 1.0
+        self.stats: Optional[Stats] = None
+        self.profiled = 0
+        self._active: Optional[Profile] = None
+
+    def enable(self, commands: Optional[Iterable[str]], sample_rate: float) -> None:
+        """
+        Starts profiling invocations.
+
+        :param commands: The qualified names of the commands to profile, or `None` for all commands.
+        :param sample_rate: The fraction of the invocations to profile.
+        """
+        self.commands = set(commands) if commands is not None else None
+        self.sample_rate = sample_rate
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.stats = None
+        self.profiled = 0
+
+    def start(self, name: str) -> Optional[Profile]:
+        """
+        Starts profiling an invocation if it is selected.
+
+        :param name: The qualified name of the command.
+        :return: The running profile, or `None` if the invocation is not profiled.
+        """
+        if (
+            not self.enabled
+            or self._active is not None
+            or (self.commands is not None and name not in self.commands)
+            or random() >= self.sample_rate
+        ):
+            return None
+        profile = Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+        self._active = profile
+        return profile
+
+    def stop(self, profile: Optional[Profile]) -> None:
+        """
+        Stops profiling an invocation and adds its stats to the aggregate.
+
+        :param profile: The profile returned by `start`.
+        """
+        if profile is None or profile is not self._active:
+            return
+        profile.disable()
+        self._active = None
+        if self.stats is None:
+            self.stats = Stats(profile)
+        else:
+            self.stats.add(profile)
+        self.profiled += 1
+
+    def report(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """
+        Renders the aggregated stats as text.
+
+        :param sort: The column to sort the functions by.
+        :param limit: The maximum number of functions to list.
+        """
+        if self.stats is None:
+            return "No invocations have been profiled yet.\n"
+        stream = StringIO()
+        self.stats.stream = stream
+        self.stats.sort_stats(sort).print_stats(limit)
+        return f"{self.profiled} profiled invocation(s)\n{stream.getvalue()}"
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the aggregated stats in the binary format of `pstats`.
+
+        :param path: The path of the file to write to.
+        """
+        if self.stats is not None:
+            self.stats.dump_stats(path)
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        loop: AbstractEventLoop,
+        threshold: float,
+        logger: Logger,
+    ) -> None:
+        """
+        Logs when the event loop is blocked for longer than a threshold.
+
+        A heartbeat coroutine on the loop keeps a timestamp up to date, while a
+        background thread checks it and logs the stack of the loop thread when
+        the heartbeat falls behind.
+
+        :param loop: The event loop to watch.
+        :param threshold: The seconds the loop may be blocked before it is reported.
+        :param logger: The logger to report blocked loops to.
+        """
+        self.loop = loop
+        self.threshold = threshold
+        self.logger = logger
+        self.stalls = 0
+        self._interval = threshold / 4
+        self._last_beat = monotonic()
+        self._loop_thread_id = get_ident()
+        self._stopped = Event()
+        self._heartbeat = None
+        self._thread = Thread(target=self._watch, name="loop-watchdog", daemon=True)
+
+    def start(self) -> None:
+        """
+        Starts watching, this has to be called from the thread that runs the loop.
+        """
+        self._loop_thread_id = get_ident()
+        self._last_beat = monotonic()
+        self._heartbeat = self.loop.create_task(self._beat())
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+
+    async def _beat(self) -> None:
+        try:
+            while True:
+                self._last_beat = monotonic()
+                await sleep(self._interval)
+        except CancelledError:
+            pass
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self._interval):
+            last_beat = self._last_beat
+            blocked = monotonic() - last_beat - self._interval
+            if blocked <= self.threshold:
+                continue
+            if reported == last_beat:
+                continue
+            reported = last_beat
+            self.stalls += 1
+            frame = _current_frames().get(self._loop_thread_id)
+            stack = "".join(format_stack(frame)) if frame is not None else ""
+            self.logger.warning(
+                f"The event loop has been blocked for {blocked:.3f} seconds\n{stack}"
+            )
@@ -0,0 +1,55 @@
+from json import dumps
+from logging import Formatter
+from logging.handlers import (
+    QueueHandler,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Puts the records on the queue as they are, so their messages are only
+    formatted on the listener thread, by the handlers that accept them.
+    Arguments that are changed after the call are logged with their new value.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return dumps(entry, ensure_ascii=False)
+
+
+def rotating_file_handler(filename: str, logging_config: dict):
+    """
+    Creates a file handler that rotates by time when `rotate_when` is set, or by size otherwise.
+
+    :param filename: The path of the log file.
+    :param logging_config: The `logging` section of the config.
+    """
+    if logging_config.get("rotate_when"):
+        return TimedRotatingFileHandler(
+            filename=filename,
+            when=logging_config["rotate_when"],
+            backupCount=logging_config.get("backup_count", 5),
+            encoding="utf-8",
+        )
+    return RotatingFileHandler(
+        filename=filename,
+        maxBytes=logging_config.get("max_bytes", 10485760),
+        backupCount=logging_config.get("backup_count", 5),
+        encoding="utf-8",
+    )
@@ -0,0 +1,211 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PHASES = ("total", "parse", "handler", "database", "response")
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    float("inf"),
+)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self) -> None:
+        """
+        Counts durations in fixed buckets, so its memory use does not grow with the number of observations.
+        """
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Estimates a percentile by interpolating inside the bucket it falls in.
+
+        :param fraction: The percentile, between 0 and 1.
+        :return: The estimated duration in seconds.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) - 1 else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-2]
+
+
+class CommandStats:
+    __slots__ = ("count", "errors", "phases")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.phases: Dict[str, Histogram] = {}
+
+
+class CommandTimer:
+    __slots__ = ("started", "phases", "owner", "finished")
+
+    def __init__(self) -> None:
+        """
+        Collects the phase durations of a single command invocation.
+        """
+        self.started = perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.owner: Optional[str] = None
+        self.finished = False
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def mark_parsed(self) -> None:
+        self.phases["parse"] = perf_counter() - self.started
+
+    def finish(self) -> Optional[Dict[str, float]]:
+        """
+        Stops the timer, the time not spent in another phase is counted as handler time.
+
+        :return: The phase durations, or `None` if the timer was already finished.
+        """
+        if self.finished:
+            return None
+        self.finished = True
+        total = perf_counter() - self.started
+        self.phases["total"] = total
+        self.phases["handler"] = max(
+            0.0,
+            total
+            - sum(
+                self.phases.get(phase, 0.0)
+                for phase in ("parse", "database", "response")
+            ),
+        )
+        return self.phases
+
+
+"""
+The timer of the command that is running in the current task, so code deeper
+down, like the database, can add its time to the right invocation.
+"""
+current_timer: ContextVar[Optional[CommandTimer]] = ContextVar(
+    "current_timer", default=None
+)
+
+
+def add_phase_time(phase: str, seconds: float) -> None:
+    timer = current_timer.get()
+    if timer is not None:
+        timer.add(phase, seconds)
+
+
+class Metrics:
+    def __init__(self) -> None:
+        """
+        Keeps the invocation counts, error counts and phase durations of every command.
+        """
+        self.commands: Dict[str, CommandStats] = {}
+
+    def record(self, name: str, phases: Dict[str, float], failed: bool = False) -> None:
+        """
+        Records a single invocation of a command.
+
+        :param name: The qualified name of the command.
+        :param phases: The durations of the phases of the invocation, in seconds.
+        :param failed: Whether the invocation failed.
+        """
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        stats.count += 1
+        if failed:
+            stats.errors += 1
+        for phase, seconds in phases.items():
+            histogram = stats.phases.get(phase)
+            if histogram is None:
+                histogram = stats.phases[phase] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[CommandTimer]:
+        """
+        Records the block as an invocation, which fails if the block raises.
+
+        :param name: The name to record the invocation under.
+        """
+        timer = CommandTimer()
+        token = current_timer.set(timer)
+        failed = True
+        try:
+            yield timer
+            failed = False
+        finally:
+            current_timer.reset(token)
+            self.record(name, timer.finish(), failed)
+
+    def summary(self) -> List[Tuple[str, CommandStats]]:
+        """
+        Lists the stats of every command, busiest first.
+        """
+        return sorted(self.commands.items(), key=lambda item: (-item[1].count, item[0]))
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# TYPE humbot_command_invocations_total counter",
+            "# TYPE humbot_command_errors_total counter",
+            "# TYPE humbot_command_duration_seconds histogram",
+        ]
+        for name, stats in self.summary():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(
+                f'humbot_command_invocations_total{{command="{label}"}} {stats.count}'
+            )
+            lines.append(
+                f'humbot_command_errors_total{{command="{label}"}} {stats.errors}'
+            )
+            for phase in PHASES:
+                histogram = stats.phases.get(phase)
+                if histogram is None:
+                    continue
+                labels = f'command="{label}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f'humbot_command_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}'
+                    )
+                lines.append(
+                    f"humbot_command_duration_seconds_sum{{{labels}}} {histogram.sum}"
+                )
+                lines.append(
+                    f"humbot_command_duration_seconds_count{{{labels}}} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
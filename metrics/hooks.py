@@ -0,0 +1,78 @@
+from time import perf_counter
+from typing import Optional
+
+from discord import Interaction, app_commands
+from discord.ext.commands import Context
+
+from metrics import CommandTimer, current_timer
+
+
+class MetricsContext(Context):
+    def __init__(self, **attrs) -> None:
+        """
+        A context that times its invocation, sharing the timer of its interaction if it has one.
+        """
+        super().__init__(**attrs)
+        timer = None
+        if self.interaction is not None:
+            timer = self.interaction.extras.get("timer")
+        if timer is None:
+            timer = CommandTimer()
+            current_timer.set(timer)
+        timer.owner = "context"
+        self.timer: CommandTimer = timer
+
+    async def send(self, *args, **kwargs):
+        started = perf_counter()
+        try:
+            return await super().send(*args, **kwargs)
+        finally:
+            self.timer.add("response", perf_counter() - started)
+
+
+class MetricsCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        timer = CommandTimer()
+        interaction.extras["timer"] = timer
+        current_timer.set(timer)
+        return True
+
+    async def on_error(
+        self, interaction: Interaction, error: app_commands.AppCommandError
+    ) -> None:
+        record_interaction(interaction, failed=True)
+        await super().on_error(interaction, error)
+
+
+def record_interaction(interaction: Interaction, failed: bool = False) -> None:
+    """
+    Records an application command invocation, unless a hybrid command context already does.
+
+    :param interaction: The interaction of the invocation.
+    :param failed: Whether the invocation failed.
+    """
+    timer: Optional[CommandTimer] = interaction.extras.get("timer")
+    if timer is None or timer.owner is not None or interaction.command is None:
+        return
+    phases = timer.finish()
+    if phases is not None:
+        interaction.client.metrics.record(  # noqa
+            interaction.command.qualified_name, phases, failed
+        )
+
+
+def record_context(context: Context, failed: bool = False) -> None:
+    """
+    Records a prefix or hybrid command invocation.
+
+    :param context: The context of the invocation.
+    :param failed: Whether the invocation failed.
+    """
+    timer: Optional[CommandTimer] = getattr(context, "timer", None)
+    if timer is None or context.command is None:
+        return
+    phases = timer.finish()
+    if phases is not None:
+        context.bot.metrics.record(  # noqa
+            context.command.qualified_name, phases, failed
+        )
@@ -0,0 +1,27 @@
+from aiohttp import web
+
+from metrics import Metrics
+
+
+async def start_metrics_server(metrics: Metrics, host: str, port: int) -> web.AppRunner:
+    """
+    Serves the metrics in the Prometheus text format on `/metrics`.
+
+    :param metrics: The metrics to serve.
+    :param host: The address to listen on.
+    :param port: The port to listen on.
+    :return: The runner of the server, which should be cleaned up on shutdown.
+    """
+
+    async def handle_metrics(_: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics.render_prometheus(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    application = web.Application()
+    application.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(application, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,147 @@
+from asyncio import run
+from io import BytesIO, TextIOWrapper
+from os.path import dirname, realpath
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from database import DatabaseManager, load_profile, parse_links
+
+ROOT = realpath(f"{dirname(__file__)}/..")
+
+
+def open_upload(data: bytes) -> TextIOWrapper:
+    return TextIOWrapper(
+        BytesIO(data), encoding="utf-8-sig", errors="surrogateescape", newline=""
+    )
+
+
+class ParseLinksTest(TestCase):
+    def test_skips_out_of_range_user_ids(self) -> None:
+        data = b"user_id,bbb_id,bbb_name\n0,a,b\n-5,a,b\n9223372036854775808,a,b\n9223372036854775807,a,b\n"
+        skipped = []
+        links = list(parse_links(open_upload(data), "csv", skipped))
+        self.assertEqual(links, [(9223372036854775807, "a", "b")])
+        self.assertEqual(skipped, [2, 3, 4])
+
+    def test_import_skips_oversized_user_id(self) -> None:
+        rows = ["user_id,bbb_id,bbb_name"]
+        rows.extend(
+            f"{user_id},ID{user_id},Name{user_id}" for user_id in range(1, 12001)
+        )
+        rows[6001] = "99999999999999999999,ID,Name"
+        data = ("\n".join(rows) + "\n").encode()
+
+        async def import_file():
+            with TemporaryDirectory() as directory:
+                database = await DatabaseManager.open(
+                    f"{directory}/test.db", load_profile({})
+                )
+                try:
+                    await database.init_schema(
+                        f"{ROOT}/database/schema.sql", f"{ROOT}/database/migrations"
+                    )
+                    skipped = []
+                    imported = await database.import_links(
+                        parse_links(open_upload(data), "csv", skipped)
+                    )
+                    async with database.reader() as reader:
+                        async with reader.execute("SELECT COUNT(*) FROM bbb") as cursor:
+                            (count,) = await cursor.fetchone()
+                    return imported, skipped, count
+                finally:
+                    await database.close()
+
+        imported, skipped, count = run(import_file())
+        self.assertEqual(skipped, [6002])
+        self.assertEqual(imported, 11999)
+        self.assertEqual(count, 11999)
+
+
+class OpenTest(TestCase):
+    def test_read_pool_with_special_characters_in_path(self) -> None:
+        async def lookup():
+            with TemporaryDirectory(suffix=" #a?b%20c") as directory:
+                database = await DatabaseManager.open(
+                    f"{directory}/test.db", load_profile({})
+                )
+                try:
+                    await database.init_schema(
+                        f"{ROOT}/database/schema.sql", f"{ROOT}/database/migrations"
+                    )
+                    await database.set_bbb_id(1, "ID", "Name")
+                    database.invalidate_link()
+                    return await database.get_bbb_id(1)
+                finally:
+                    await database.close()
+
+        self.assertEqual(run(lookup()), ("ID", "Name"))
+
+
+class LoadProfileTest(TestCase):
+    def test_defaults_are_valid(self) -> None:
+        self.assertEqual(load_profile({})["batch_size"], 100)
+
+    def test_rejects_invalid_settings(self) -> None:
+        for setting, value in (
+            ("batch_size", 0),
+            ("batch_size", 1.5),
+            ("batch_size", "100"),
+            ("read_pool_size", -1),
+            ("link_cache_size", -10),
+            ("mmap_size", True),
+            ("batch_window", -0.1),
+            ("link_cache_ttl", "300"),
+        ):
+            with self.subTest(setting=setting, value=value):
+                with self.assertRaisesRegex(ValueError, f"Invalid database {setting}"):
+                    load_profile({"database": {setting: value}})
+
+    def test_accepts_boundaries(self) -> None:
+        profile = load_profile(
+            {"database": {"batch_size": 1, "read_pool_size": 0, "cache_size": -2000}}
+        )
+        self.assertEqual(profile["read_pool_size"], 0)
+
+
+class SearchLinksTest(TestCase):
+    def search(self, *queries: str):
+        async def search_all():
+            with TemporaryDirectory() as directory:
+                database = await DatabaseManager.open(
+                    f"{directory}/test.db", load_profile({})
+                )
+                try:
+                    await database.init_schema(
+                        f"{ROOT}/database/schema.sql", f"{ROOT}/database/migrations"
+                    )
+                    await database.import_links(
+                        [
+                            (1, "123456", "Abby"),
+                            (2, "654321", "Bob"),
+                            (3, "50%_off", "Sale"),
+                        ]
+                    )
+                    return [
+                        [
+                            user_id
+                            for user_id, _, _ in await database.search_links(query)
+                        ]
+                        for query in queries
+                    ]
+                finally:
+                    await database.close()
+
+        return run(search_all())
+
+    def test_short_and_long_queries_follow_the_same_rules(self) -> None:
+        self.assertEqual(
+            self.search("ab", "abb", "AB", "34", "345", "bo"),
+            [[1], [1], [1], [1], [1], [2]],
+        )
+
+    def test_short_queries_match_wildcards_literally(self) -> None:
+        self.assertEqual(self.search("%", "_o"), [[3], [3]])
+
+    def test_rejects_empty_queries(self) -> None:
+        with self.assertRaises(ValueError):
+            self.search("   ")
@@ -0,0 +1,37 @@
+from io import StringIO
+from json import loads
+from logging import StreamHandler, getLogger
+from logging.handlers import QueueListener
+from queue import SimpleQueue
+from unittest import TestCase
+
+from logs import JsonFormatter, LazyQueueHandler
+
+
+class JsonFormatterTest(TestCase):
+    def test_lazy_mode_keeps_tracebacks(self) -> None:
+        stream = StringIO()
+        handler = StreamHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        queue = SimpleQueue()
+        listener = QueueListener(queue, handler)
+        logger = getLogger("tests.logs")
+        logger.propagate = False
+        queue_handler = LazyQueueHandler(queue)
+        logger.addHandler(queue_handler)
+        listener.start()
+        try:
+            try:
+                raise RuntimeError("boom")
+            except RuntimeError:
+                logger.exception("Something failed with %s", "details")
+            logger.warning("Here", stack_info=True)
+        finally:
+            listener.stop()
+            logger.removeHandler(queue_handler)
+
+        exception, stack = [loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(exception["message"], "Something failed with details")
+        self.assertIn("Traceback (most recent call last)", exception["exception"])
+        self.assertIn("RuntimeError: boom", exception["exception"])
+        self.assertIn("Stack (most recent call last)", stack["stack"])
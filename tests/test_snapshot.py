@@ -0,0 +1,24 @@
+from os import stat
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from catalog import snapshot
+from catalog.snapshot import read_snapshot, write_snapshot
+
+
+class SnapshotTest(TestCase):
+    def test_round_trip(self) -> None:
+        with TemporaryDirectory() as directory:
+            path = f"{directory}/data.snapshot"
+            write_snapshot(path, {"monsters": [1, 2]}, stat(directory), b"\0" * 32)
+            loaded = read_snapshot(path)
+            self.assertIsNotNone(loaded)
+            self.assertEqual(loaded.load(), {"monsters": [1, 2]})
+
+    def test_rejects_snapshots_of_other_catalog_code(self) -> None:
+        with TemporaryDirectory() as directory:
+            path = f"{directory}/data.snapshot"
+            write_snapshot(path, {"monsters": [1, 2]}, stat(directory), b"\0" * 32)
+            with patch.object(snapshot, "code_digest", return_value=b"\1" * 32):
+                self.assertIsNone(read_snapshot(path))
@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+from views import EMBED_DESCRIPTION_LIMIT, build_pages
+
+
+class BuildPagesTest(TestCase):
+    def test_pages_stay_within_the_description_limit(self) -> None:
+        entries = [f"{index}: " + "x" * 1500 for index in range(10)]
+        pages = build_pages("Title", "Header:\n", entries, 5, 0xBEBEFE)
+        self.assertEqual(len(pages), 5)
+        for page in pages:
+            self.assertLessEqual(len(page.description), EMBED_DESCRIPTION_LIMIT)
+            self.assertTrue(page.description.startswith("Header:\n"))
+        joined = "".join(page.description for page in pages)
+        for index in range(10):
+            self.assertIn(f"{index}: ", joined)
+
+    def test_pages_respect_the_entry_count(self) -> None:
+        pages = build_pages("Title", "", [str(index) for index in range(12)], 5, 0)
+        self.assertEqual(
+            [page.description.count("\n") + 1 for page in pages], [5, 5, 2]
+        )
+
+    def test_oversized_entry_is_clipped(self) -> None:
+        pages = build_pages("Title", "Header\n", ["x" * 5000], 5, 0)
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(len(pages[0].description), EMBED_DESCRIPTION_LIMIT)
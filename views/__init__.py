@@ -0,0 +1,104 @@
+from typing import List, Optional
+
+from discord import ButtonStyle, Embed, HTTPException, Interaction, Message
+from discord.ext.commands import Context
+from discord.ui import Button, View, button
+
+
+class Paginator(View):
+    def __init__(self, author_id: int, pages: List[Embed], timeout: float = 180.0):
+        """
+        Lets the user that invoked a command page through its result embeds.
+
+        :param author_id: The ID of the user that may turn the pages.
+        :param pages: The embeds to page through.
+        :param timeout: The seconds of inactivity after which the buttons are removed.
+        """
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.pages = pages
+        self.page = 0
+        self.message: Optional[Message] = None
+        for index, page in enumerate(pages):
+            page.set_footer(text=f"Page {index + 1}/{len(pages)}")
+        self.update_buttons()
+
+    def update_buttons(self) -> None:
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page == len(self.pages) - 1
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    async def show_page(self, interaction: Interaction, page: int) -> None:
+        self.page = page
+        self.update_buttons()
+        await interaction.response.edit_message(  # noqa
+            embed=self.pages[self.page], view=self
+        )
+
+    @button(label="Previous", style=ButtonStyle.secondary)
+    async def previous_page(self, interaction: Interaction, _: Button) -> None:
+        await self.show_page(interaction, self.page - 1)
+
+    @button(label="Next", style=ButtonStyle.secondary)
+    async def next_page(self, interaction: Interaction, _: Button) -> None:
+        await self.show_page(interaction, self.page + 1)
+
+    async def on_timeout(self) -> None:
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except HTTPException:
+                pass
+
+
+EMBED_DESCRIPTION_LIMIT = 4096
+
+
+def build_pages(
+    title: str, header: str, entries: List[str], per_page: int, color: int
+) -> List[Embed]:
+    """
+    Splits entries over embeds, starting a new page when it is full or would exceed the description limit.
+
+    :param title: The title of every page.
+    :param header: The text above the entries on every page.
+    :param entries: The entries, which are separated by newlines.
+    :param per_page: The maximum number of entries per page.
+    :param color: The color of every page.
+    :return: The pages.
+    """
+    limit = EMBED_DESCRIPTION_LIMIT - len(header)
+    pages = []
+    page: List[str] = []
+    length = 0
+    for entry in entries:
+        if len(entry) > limit:
+            entry = entry[: limit - 1] + "…"
+        if page and (len(page) >= per_page or length + 1 + len(entry) > limit):
+            pages.append(page)
+            page = []
+            length = 0
+        page.append(entry)
+        length += len(entry) + 1
+    if page or not pages:
+        pages.append(page)
+    return [
+        Embed(title=title, description=header + "\n".join(page), color=color)
+        for page in pages
+    ]
+
+
+async def send_pages(context: Context, pages: List[Embed]) -> None:
+    """
+    Sends result embeds, with page buttons if there is more than one.
+
+    :param context: The command context to respond to.
+    :param pages: The embeds to send.
+    """
+    if len(pages) == 1:
+        await context.send(embed=pages[0], ephemeral=True)
+        return
+    view = Paginator(context.author.id, pages)
+    view.message = await context.send(embed=pages[0], view=view, ephemeral=True)